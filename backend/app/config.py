@@ -17,6 +17,13 @@ class Settings(BaseModel):
     DB_PORT: int = Field(3306)
     DB_NAME: str = Field(...)
 
+    # Connection pool. Every websocket event that touches the DB checks out its own session,
+    # so the pool is sized for bursts of lobby events rather than SQLAlchemy's default 5 + 10
+    DB_POOL_SIZE: int = Field(20)
+    DB_MAX_OVERFLOW: int = Field(20)
+    DB_POOL_TIMEOUT: int = Field(10)
+    DB_POOL_RECYCLE: int = Field(1800)
+
     @property
     def database_url(self) -> str:
         return f"mysql+aiomysql://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}?charset=utf8mb4"
@@ -29,6 +36,10 @@ try:
         DB_HOST=os.getenv("DB_HOST", "127.0.0.1"),
         DB_PORT=int(os.getenv("DB_PORT", 3306)),
         DB_NAME=os.getenv("DB_NAME"),
+        DB_POOL_SIZE=int(os.getenv("DB_POOL_SIZE", 20)),
+        DB_MAX_OVERFLOW=int(os.getenv("DB_MAX_OVERFLOW", 20)),
+        DB_POOL_TIMEOUT=int(os.getenv("DB_POOL_TIMEOUT", 10)),
+        DB_POOL_RECYCLE=int(os.getenv("DB_POOL_RECYCLE", 1800)),
     )
 except ValidationError as e:
     raise RuntimeError(f"Invalid environment configuration: {e}")
@@ -1,6 +1,43 @@
-from typing import Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 from fastapi import WebSocket
 import asyncio
+import zlib
+
+import msgspec
+import orjson
+
+
+# Upper bound on a single send; a client that stalls longer is dropped
+SEND_TIMEOUT_SECONDS: float = 5.0
+
+# Messages waiting for a client's sender task; a client that falls this far behind is dropped
+SEND_QUEUE_SIZE: int = 256
+
+# Close code sent to a client dropped for falling behind ("Try Again Later")
+SLOW_CLIENT_CLOSE_CODE: int = 1013
+
+# Clients that offer this WebSocket subprotocol get MessagePack frames; everyone else keeps JSON
+MSGPACK_SUBPROTOCOL: str = "msgpack"
+
+# Clients may send their access token as the subprotocol that follows this marker; the marker is echoed back
+AUTH_SUBPROTOCOL: str = "uno.auth"
+
+# Errors raised by decode() for a malformed inbound frame, in either format
+DECODE_ERRORS: Tuple[type, ...] = (orjson.JSONDecodeError, msgspec.DecodeError)
+
+# Large broadcasts to several JSON clients are zlib-compressed once and sent with this leading byte.
+# Uncompressed JSON frames always start with '{', so clients can tell the two apart
+COMPRESSED_FLAG: bytes = b"\x01"
+COMPRESS_MIN_BYTES: int = 512
+COMPRESS_MIN_RECIPIENTS: int = 3
+
+# Up to this many queued JSON messages are sent together as one {"event":"batch","events":[...]} frame
+MAX_BATCH_MESSAGES: int = 32
+_BATCH_PREFIX: bytes = b'{"event":"batch","events":['
+_BATCH_SUFFIX: bytes = b']}'
+
+_msgpack_encoder = msgspec.msgpack.Encoder()
+_msgpack_decoder = msgspec.msgpack.Decoder()
 
 
 class ConnectionManager:
@@ -19,56 +56,285 @@ class ConnectionManager:
         # Map User ID -> Display Name
         self.user_names: Dict[str, str] = {}
 
-        self._lock = asyncio.Lock()
+        # Map User ID -> (Game ID, Game version) last sent, to skip re-sending unchanged state
+        self.sent_versions: Dict[str, Tuple[str, int]] = {}
+
+        # Map User ID -> (Game ID, game fields) last sent, so later updates only carry what changed
+        self.sent_fields: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+
+        # Sockets that negotiated the MessagePack subprotocol
+        self.msgpack_sockets: Set[WebSocket] = set()
+
+        # Each socket has an outgoing queue drained by its own sender task, so producers never await a send
+        self._send_queues: Dict[WebSocket, asyncio.Queue] = {}
+        self._sender_tasks: Dict[WebSocket, asyncio.Task] = {}
+
+        # Map WebSocket -> User ID for sockets dropped for being too slow, until their handler calls disconnect()
+        self._dropped_connections: Dict[WebSocket, str] = {}
+
+        # Close handshakes of dropped sockets; the loop only holds tasks weakly
+        self._close_tasks: Set[asyncio.Task] = set()
 
     async def connect(self, websocket: WebSocket, user_id: str, display_name: str) -> None:
-        await websocket.accept()
-        async with self._lock:
-            if user_id in self.user_connections:
-                old_ws = self.user_connections[user_id]
-                try:
-                    await old_ws.close(code=1000, reason="Logged in elsewhere")
-                    if old_ws in self.active_connections:
-                        del self.active_connections[old_ws]
-                except Exception:
-                    pass
+        subprotocols: List[str] = websocket.scope.get("subprotocols", [])
+        use_msgpack: bool = MSGPACK_SUBPROTOCOL in subprotocols
+
+        # Browsers fail the handshake if they offered subprotocols and none is echoed back
+        subprotocol: Optional[str] = None
+        if use_msgpack:
+            subprotocol = MSGPACK_SUBPROTOCOL
+        elif AUTH_SUBPROTOCOL in subprotocols:
+            subprotocol = AUTH_SUBPROTOCOL
+        await websocket.accept(subprotocol=subprotocol)
+
+        # Every mapping change below runs without awaiting, so it is atomic on the event loop and needs no lock.
+        # The old socket is unmapped before its close handshake is awaited
+        old_ws: Optional[WebSocket] = self.user_connections.get(user_id)
+        if old_ws is not None and self.active_connections.pop(old_ws, None) is not None:
+            self.msgpack_sockets.discard(old_ws)
+            self._stop_sender(old_ws)
+
+        if old_ws is not None:
+            try:
+                await old_ws.close(code=1000, reason="Logged in elsewhere")
+            except Exception:
+                pass
+
+        # A socket of this user dropped earlier must not take the user out of their game when its handler exits
+        for dropped_ws in [ws for ws, uid in self._dropped_connections.items() if uid == user_id]:
+            del self._dropped_connections[dropped_ws]
+
+        self.sent_versions.pop(user_id, None)
+        self.sent_fields.pop(user_id, None)
+        self.active_connections[websocket] = user_id
+        self.user_connections[user_id] = websocket
+        self.user_names[user_id] = display_name
+        if use_msgpack:
+            self.msgpack_sockets.add(websocket)
 
-            self.active_connections[websocket] = user_id
-            self.user_connections[user_id] = websocket
-            self.user_names[user_id] = display_name
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+        self._send_queues[websocket] = queue
+        self._sender_tasks[websocket] = asyncio.create_task(self._sender_loop(websocket, queue))
 
     async def disconnect(self, websocket: WebSocket) -> str | None:
         """Removes the connection and returns the user_id that left."""
-        async with self._lock:
-            user_id = self.active_connections.get(websocket)
-            if user_id:
-                del self.active_connections[websocket]
-                if user_id in self.user_connections:
-                    del self.user_connections[user_id]
-                if user_id in self.user_names:
-                    del self.user_names[user_id]
-            return user_id
+        user_id = self._remove_connection(websocket)
+        if user_id is None:
+            user_id = self._dropped_connections.pop(websocket, None)
+        return user_id
+
+    def _remove_connection(self, websocket: WebSocket) -> str | None:
+        """
+        Drops every mapping for a socket. It never awaits, so it is atomic on the event loop.
+        """
+        user_id = self.active_connections.pop(websocket, None)
+        self.msgpack_sockets.discard(websocket)
+        self._stop_sender(websocket)
+        if user_id:
+            self.user_connections.pop(user_id, None)
+            self.user_names.pop(user_id, None)
+            self.sent_versions.pop(user_id, None)
+            self.sent_fields.pop(user_id, None)
+        return user_id
+
+    def _drop_slow_client(self, websocket: WebSocket) -> None:
+        """
+        Unmaps a client that fell behind or stalled a send and closes its socket in the background.
+        The user_id is kept until the socket's handler calls disconnect(), so it can still leave its game.
+        """
+        user_id = self._remove_connection(websocket)
+        if user_id is None:
+            return
+
+        self._dropped_connections[websocket] = user_id
+        task = asyncio.create_task(self._close_slow_client(websocket))
+        self._close_tasks.add(task)
+        task.add_done_callback(self._close_tasks.discard)
+
+    @staticmethod
+    async def _close_slow_client(websocket: WebSocket) -> None:
+        try:
+            await asyncio.wait_for(
+                websocket.close(code=SLOW_CLIENT_CLOSE_CODE, reason="Client too slow"),
+                timeout=SEND_TIMEOUT_SECONDS,
+            )
+        except Exception:
+            pass
+
+    def _stop_sender(self, websocket: WebSocket) -> None:
+        """Discards a socket's outgoing queue and cancels its sender task."""
+        self._send_queues.pop(websocket, None)
+        task: Optional[asyncio.Task] = self._sender_tasks.pop(websocket, None)
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+
+    async def _sender_loop(self, websocket: WebSocket, queue: asyncio.Queue) -> None:
+        """
+        Sends a socket's queued messages in order. Exits, dropping the connection, on the first failed send.
+        Messages queued in the same tick (or while the previous frame was being sent) are coalesced.
+        """
+        # wait_for can swallow a cancel that lands as a send completes, so also stop once the queue is discarded
+        while self._send_queues.get(websocket) is queue:
+            messages: List[str | bytes] = [await queue.get()]
+
+            # Let producers running in this same tick (e.g. the rest of a turn's updates) queue theirs first
+            if queue.empty():
+                await asyncio.sleep(0)
+            while not queue.empty() and len(messages) < MAX_BATCH_MESSAGES:
+                messages.append(queue.get_nowait())
+
+            frames = messages if websocket in self.msgpack_sockets else self._coalesce(messages)
+            for frame in frames:
+                send = websocket.send_bytes(frame) if isinstance(frame, bytes) else websocket.send_text(frame)
+                try:
+                    await asyncio.wait_for(send, timeout=SEND_TIMEOUT_SECONDS)
+                except Exception:
+                    self._drop_slow_client(websocket)
+                    return
+
+    @staticmethod
+    def _coalesce(messages: List[str | bytes]) -> List[str | bytes]:
+        """
+        Joins runs of consecutive JSON-object messages into batch frames, keeping their order.
+        Text and compressed frames are passed through on their own.
+        """
+        if len(messages) == 1:
+            return messages
+
+        frames: List[str | bytes] = []
+        run: List[bytes] = []
+        for message in messages:
+            if isinstance(message, bytes) and message[:1] == b"{":
+                run.append(message)
+                continue
+            if run:
+                frames.append(run[0] if len(run) == 1 else _BATCH_PREFIX + b",".join(run) + _BATCH_SUFFIX)
+                run = []
+            frames.append(message)
+
+        if run:
+            frames.append(run[0] if len(run) == 1 else _BATCH_PREFIX + b",".join(run) + _BATCH_SUFFIX)
+        return frames
+
+    def _enqueue(self, websocket: WebSocket, message: str | bytes) -> bool:
+        """
+        Queues a message for a socket's sender task.
+        Returns False if the client is too far behind to take it.
+        """
+        queue: Optional[asyncio.Queue] = self._send_queues.get(websocket)
+        if queue is None:
+            return True
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    @staticmethod
+    def subprotocol_token(websocket: WebSocket) -> Optional[str]:
+        """
+        Returns the access token a client offered after the auth subprotocol marker, if any.
+        """
+        subprotocols: List[str] = websocket.scope.get("subprotocols", [])
+        try:
+            return subprotocols[subprotocols.index(AUTH_SUBPROTOCOL) + 1]
+        except (ValueError, IndexError):
+            return None
+
+    def claim_version(self, user_id: str, game_id: str, version: int) -> bool:
+        """
+        Records that this version of a game is being sent to a user.
+        Returns False if the user already received it, so the send can be skipped.
+        """
+        stamp = (game_id, version)
+        if self.sent_versions.get(user_id) == stamp:
+            return False
+        self.sent_versions[user_id] = stamp
+        return True
+
+    def diff_fields(self, user_id: str, game_id: str, fields: Dict[str, Any], full: bool = False) -> Tuple[Dict[str, Any], bool]:
+        """
+        Records `fields` as the state of a game sent to a user and returns (fields to send, is_full).
+        Only fields that changed since the user's last update are returned, unless a full snapshot is
+        forced or the user has no earlier update for this game (e.g. after reconnecting).
+        The caller must not mutate the values in `fields` afterwards.
+        """
+        previous = self.sent_fields.get(user_id)
+        self.sent_fields[user_id] = (game_id, fields)
+
+        if full or previous is None or previous[0] != game_id:
+            return dict(fields), True
+
+        last_fields: Dict[str, Any] = previous[1]
+        return {key: value for key, value in fields.items() if key not in last_fields or last_fields[key] != value}, False
+
+    def decode(self, websocket: WebSocket, data: str | bytes) -> Any:
+        """
+        Decodes an inbound frame in the format the socket negotiated.
+        Raises one of DECODE_ERRORS if the frame is malformed.
+        """
+        if isinstance(data, bytes) and websocket in self.msgpack_sockets:
+            return _msgpack_decoder.decode(data)
+        return orjson.loads(data)
+
+    @staticmethod
+    def _to_msgpack(payload: str | bytes) -> bytes:
+        """Re-encodes a JSON payload as MessagePack."""
+        return _msgpack_encoder.encode(orjson.loads(payload))
 
     async def get_name(self, user_id: str) -> str:
         """Helper to retrieve a display name by ID."""
         return self.user_names.get(user_id, "Unknown")
 
-    async def send_personal_message(self, message: str, user_id: str):
-        """Send a message to a specific user by ID."""
-        if user_id in self.user_connections:
-            websocket = self.user_connections[user_id]
-            try:
-                await websocket.send_text(message)
-            except Exception:
-                await self.disconnect(websocket)
+    async def send_personal_message(self, message: str | bytes, user_id: str):
+        """
+        Queue a message for a specific user by ID. Pre-encoded bytes go out as a binary frame.
+        Returns as soon as the message is queued; the user's sender task does the actual send.
+        """
+        websocket: Optional[WebSocket] = self.user_connections.get(user_id)
+        if websocket is None:
+            return
+
+        if websocket in self.msgpack_sockets:
+            message = self._to_msgpack(message)
+
+        if not self._enqueue(websocket, message):
+            self._drop_slow_client(websocket)
 
     async def broadcast(self, message: str) -> None:
         """Send to EVERYONE connected (Global Lobby Chat)."""
-        async with self._lock:
+        await self.broadcast_text(message)
+
+    async def broadcast_text(self, message: str, user_ids: Optional[Iterable[str]] = None) -> None:
+        """
+        Sends the same message to every connection, or only to the given users.
+        The payload is UTF-8 encoded once and the same bytes are shared by every socket.
+        """
+        await self.broadcast_bytes(message.encode("utf-8"), user_ids)
+
+    async def broadcast_bytes(self, payload: bytes, user_ids: Optional[Iterable[str]] = None) -> None:
+        """
+        Queues an already-encoded JSON payload for every connection, or only for the given users.
+        Every socket shares the same bytes object; it is re-encoded as MessagePack at most once,
+        and only if a recipient negotiated it. Large payloads for JSON clients are compressed once.
+        """
+        if user_ids is None:
             sockets = list(self.active_connections.keys())
+        else:
+            sockets = [ws for ws in map(self.user_connections.get, user_ids) if ws is not None]
+
+        json_payload: bytes = payload
+        if len(payload) >= COMPRESS_MIN_BYTES and len(sockets) >= COMPRESS_MIN_RECIPIENTS:
+            json_payload = COMPRESSED_FLAG + zlib.compress(payload, 1)
 
+        msgpack_payload: Optional[bytes] = None
         for ws in sockets:
-            try:
-                await ws.send_text(message)
-            except Exception:
-                await self.disconnect(ws)
\ No newline at end of file
+            if ws in self.msgpack_sockets:
+                if msgpack_payload is None:
+                    msgpack_payload = self._to_msgpack(payload)
+                queued = self._enqueue(ws, msgpack_payload)
+            else:
+                queued = self._enqueue(ws, json_payload)
+
+            if not queued:
+                self._drop_slow_client(ws)
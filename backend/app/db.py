@@ -6,7 +6,19 @@ from .config import settings
 Base = declarative_base()
 
 # Async engine using aiomysql
-engine = create_async_engine(settings.database_url, echo=False, future=True)
+# Bulk inserts are sent as multi-row INSERT ... VALUES statements of up to 1000 rows.
+# Connections are pinged on checkout and recycled before MySQL's wait_timeout can drop them
+engine = create_async_engine(
+    settings.database_url,
+    echo=False,
+    future=True,
+    insertmanyvalues_page_size=1000,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=True,
+)
 
 # Session factory
 async_session = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
@@ -1,11 +1,28 @@
+import asyncio
+import itertools
+import logging
 import random
-from typing import Dict, List, Optional, Set
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Deque, Dict, List, Optional, Tuple
 
 from app.pydantic_models.game import Game
 from app.pydantic_models.game_settings import GameSettings, StackingMode, AFKBehavior
 # Assuming these imports exist in your project structure
-from app.utils import create_deck, SPECIAL_CARDS, WILD_CARDS, advance_turn_counter, retrieve_card_info, \
-    REGULAR_CARDS
+from app.utils import create_deck, generate_game_ids, retrieve_card_info, REGULAR_CARDS, CARD_BIT, CARD_ID, \
+    CARD_INFO, playable_mask, CARD_SKIP, CARD_REVERSE, CARD_DRAW2, CARD_WILD, CARD_WILD4, CARD_WILD_FLAGS
+
+
+logger = logging.getLogger(__name__)
+
+# Process-wide source of game versions, so a version number is never reused even across recreated game IDs
+_version_clock = itertools.count(1)
+
+# How many game IDs are generated at once whenever the pool runs dry
+GAME_ID_POOL_SIZE: int = 1024
+
+# (game, None) on success, (None, reason) when the request is refused
+GameResult = Tuple[Optional[Game], Optional[str]]
 
 
 class GameManager:
@@ -21,25 +38,58 @@ class GameManager:
 
         self.games: Dict[str, Game] = {}
 
-    def create_game(self, game_id: str, host_id: str, host_name: str) -> Game:
+        # Pre-generated random game IDs, handed out by reserve_id()
+        self._id_pool: Deque[str] = deque()
+
+        # One lock per game so a turn and the update it triggers are applied atomically
+        self._game_locks: Dict[str, asyncio.Lock] = {}
+
+    @staticmethod
+    def _touch(game: Game) -> None:
+        """
+        Marks the game as changed so the next update is sent to every player.
+        """
+
+        game.version = next(_version_clock)
+
+    def reserve_id(self) -> str:
+        """
+        Returns a random game ID that no live game is using.
+        IDs are drawn from a pool that is refilled in batches when it runs dry.
+        """
+
+        id_pool: Deque[str] = self._id_pool
+        while True:
+            if not id_pool:
+                id_pool.extend(generate_game_ids(GAME_ID_POOL_SIZE))
+
+            game_id: str = id_pool.popleft()
+            if game_id not in self.games:
+                return game_id
+
+    def create_game(self, game_id: str, host_id: str, host_name: str) -> GameResult:
         """
         Creates a new game and adds it to the manager.
         """
 
         if game_id in self.games:
-            raise Exception("Game ID collision. Try again.")
+            return None, "Game ID collision. Try again."
 
-        self.games[game_id] = Game(
+        game: Game = Game(
             host_id= host_id,
             game_settings= GameSettings(),
             state= "waiting",
             players= [host_id],
+            player_set= {host_id},
             player_names= {
                 host_id: host_name
             },
             player_states= {
                 host_id: "ready"
             },
+            player_state_counts= {
+                "ready": 1
+            },
             player_skips= {
                 host_id: 0
             },
@@ -47,11 +97,18 @@ class GameManager:
             current_active_color= None,
             direction= 1,  # 1 = clockwise, -1 = counterclockwise
             event= None,
-            deck= [],
-            discard_pile= [],
-            player_cards= {}
+            deck= deque(),
+            discard_pile= deque(),
+            top_card_info= None,
+            player_cards= {},
+            player_hand_counts= {},
+            player_hand_masks= {},
+            active_mask= 0,
+            version= next(_version_clock)
         )
-        return self.games[game_id]
+        self.games[game_id] = game
+        self._game_locks[game_id] = asyncio.Lock()
+        return game, None
 
     def get_lobby_info(self) -> List[Dict]:
         """
@@ -82,19 +139,20 @@ class GameManager:
 
             game.game_settings = GameSettings(
                 turn_timeout_seconds=game_settings.get("turnTimer", 30),
-                stacking_mode= s_mode,
-                afk_behavior= a_behavior,
+                stacking_mode= s_mode.value,
+                afk_behavior= a_behavior.value,
                 max_afk_strikes= strikes,
                 kick_after_max_strikes= should_forfeit
             )
+            self._touch(game)
 
             return game
 
         except ValueError as e:
-            print(f"Invalid setting provided: {e}")
+            logger.warning("Invalid setting provided: %s", e)
             return None
         except Exception as e:
-            print(f"General error updating settings: {e}")
+            logger.exception("General error updating settings: %s", e)
             return None
 
     def reset_game(self, game_id: str) -> Game:
@@ -111,9 +169,14 @@ class GameManager:
         game.current_active_color = None
         game.direction = 1
         game.event = None
-        game.deck = []
-        game.discard_pile = []
+        game.deck = deque()
+        game.discard_pile = deque()
+        game.top_card_info = None
         game.player_cards = {}
+        game.player_hand_counts = {}
+        game.player_hand_masks = {}
+        game.active_mask = 0
+        self._touch(game)
 
         return game
 
@@ -131,7 +194,8 @@ class GameManager:
 
         game = self.games.get(game_id)
         if game:
-            game.player_states[user_id] = "ready"
+            self._set_player_state(game, user_id, "ready")
+            self._touch(game)
             return game
         return None
 
@@ -143,15 +207,12 @@ class GameManager:
         game: Optional[Game] = self.games.get(game_id)
         if not game: return
 
-        is_clockwise: bool = game.direction == 1
-
         assert game.current_player_index is not None
         current_player_index: int = game.current_player_index
 
-        players: List[str] = game.players
-        player_count: int = len(players)
-
-        game.current_player_index = advance_turn_counter(current_player_index, player_count, is_clockwise)
+        # direction is +1 (clockwise) or -1 (counterclockwise), so the next seat is a single modulo away
+        game.current_player_index = (current_player_index + game.direction) % len(game.players)
+        self._touch(game)
 
     def reverse_direction(self, game_id: str) -> None:
         """
@@ -161,6 +222,7 @@ class GameManager:
         game: Optional[Game] = self.games.get(game_id)
         if game:
             game.direction *= -1
+            self._touch(game)
 
     def use_wild_card(self, color: Optional[str], game_id: str) -> Optional[Game]:
         """
@@ -180,6 +242,7 @@ class GameManager:
             return game
 
         game.current_active_color = new_color
+        self._refresh_active_mask(game)
         self.advance_turn(game_id)
         return game
 
@@ -192,33 +255,38 @@ class GameManager:
         game = self.games.get(game_id)
         if game:
             game.event = {"type": event_type, "player_id": player_id, "affected_player_id": affected_player_id}
+            self._touch(game)
 
-    def join_game(self, game_id: str, user_id: str, user_name: str) -> Game:
+    def join_game(self, game_id: str, user_id: str, user_name: str) -> GameResult:
         """
         Adds a player to a game.
         """
 
         game: Optional[Game] = self.games.get(game_id)
         if not game:
-            raise Exception("Game does not exist.")
+            return None, "Game does not exist."
 
         if game.state != "waiting":
-            raise Exception("Game has already started.")
+            return None, "Game has already started."
 
         players: List[str] = game.players
         player_count: int = len(players)
 
         if player_count >= 10:
-            raise Exception("Game is full. Try again later.")
+            return None, "Game is full. Try again later."
 
-        if user_id not in players:
+        if user_id not in game.player_set:
             game.players.append(user_id)
+            game.player_set.add(user_id)
             game.player_names[user_id] = user_name
-            game.player_states[user_id] = "ready"
+            self._set_player_state(game, user_id, "ready")
             game.player_skips[user_id] = 0
             game.player_cards[user_id] = []
+            game.player_hand_counts[user_id] = {}
+            game.player_hand_masks[user_id] = 0
+            self._touch(game)
 
-        return game
+        return game, None
 
     def get_game(self, game_id: str) -> Optional[Game]:
         """
@@ -227,6 +295,21 @@ class GameManager:
 
         return self.games.get(game_id)
 
+    @asynccontextmanager
+    async def with_game(self, game_id: str) -> AsyncIterator[Optional[Game]]:
+        """
+        Holds the game's lock for the duration of the block and yields the game (None if it doesn't exist).
+        Wrap any mutation whose result is awaited on (e.g. broadcast) so turns in one game never interleave.
+        """
+
+        lock: Optional[asyncio.Lock] = self._game_locks.get(game_id)
+        if lock is None:
+            yield None
+            return
+
+        async with lock:
+            yield self.games.get(game_id)
+
     def get_player_ids(self, game_id: str) -> List[str]:
         """
         Returns a list of player IDs in the game.
@@ -240,63 +323,72 @@ class GameManager:
         Removes a player from a game.
         """
 
-        if game_id in self.games:
-            game: Game = self.games[game_id]
-            players: List[str] = game.players
+        game: Optional[Game] = self.games.get(game_id)
+        if game is None: return
 
-            if "player_names" in game.model_fields_set and user_id in game.player_names:
-                del game.player_names[user_id]
+        players: List[str] = game.players
+
+        game.player_names.pop(user_id, None)
+
+        if user_id in game.player_set:
+            game.player_set.discard(user_id)
+            players.remove(user_id)
+            self._set_player_state(game, user_id, None)
+            del game.player_skips[user_id]
 
-            if user_id in players:
-                game.players.remove(user_id)
-                del game.player_states[user_id]
-                del game.player_skips[user_id]
+            if user_id == game.host_id and len(players) > 0:
+                game.host_id = players[0]
 
-                if user_id == game.host_id and len(game.players) > 0:
-                    game.host_id = game.players[0]
+            self._touch(game)
 
-            if len(game.players) == 0:
-                del self.games[game_id]
+        if len(players) == 0:
+            del self.games[game_id]
+            self._game_locks.pop(game_id, None)
 
-    def start_game(self, game_id: str) -> Game:
+    def start_game(self, game_id: str) -> GameResult:
         """
         Starts the game if all players are ready.
         """
 
         game: Optional[Game] = self.games.get(game_id)
-        if not game: raise Exception("Game does not exist.")
+        if not game: return None, "Game does not exist."
 
         player_ids: List[str] = game.players
         if len(player_ids) < 2:
-            raise Exception("Not enough players to start game.")
+            return None, "Not enough players to start game."
 
-        player_states: Set[str] = set(game.player_states.values())
-        if "playing" in player_states:
-            return game
+        if game.player_state_counts.get("playing", 0) > 0:
+            return game, None
 
         game.state = "playing"
         for player_id in player_ids:
-            game.player_states[player_id] = "playing"
+            self._set_player_state(game, player_id, "playing")
 
-        game.deck = create_deck()
+        # Cut every hand off the shuffled list in one slice, then keep the rest as the draw deck
+        cards: List[str] = create_deck()
+        deal_size: int = 7 * len(player_ids)
+        dealt: List[str] = cards[-deal_size:]
+        del cards[-deal_size:]
 
-        for player_id in player_ids:
-            game.player_cards[player_id] = []
-            for _ in range(7):
-                if len(game.deck) > 0:
-                    game.player_cards[player_id].append(game.deck.pop())
+        for i, player_id in enumerate(player_ids):
+            self._set_hand(game, player_id, dealt[i * 7:(i + 1) * 7])
+
+        game.deck = deque(cards)
 
         if len(game.deck) > 0:
             first_card: str = game.deck.pop()
-            first_card_color, _ = retrieve_card_info(first_card)
+            game.top_card_info = retrieve_card_info(first_card)
+            first_card_color, _ = game.top_card_info
             game.discard_pile.append(first_card)
             game.current_active_color = first_card_color if first_card_color in REGULAR_CARDS else random.choice(
                 list(REGULAR_CARDS))
+            self._refresh_active_mask(game)
 
         start_index: int = random.randint(0, len(player_ids) - 1)
         game.current_player_index = start_index
+        self._touch(game)
 
-        return game
+        return game, None
 
     def process_turn(self, player_id: str, game_id: str, action: Optional[str], card: Optional[str] = None,
                      advance_turn: bool = True) -> Optional[Game]:
@@ -312,15 +404,19 @@ class GameManager:
 
         if game.current_player_index is None: return game
         current_player_index: int = game.current_player_index
+        current_player_id: str = players[current_player_index]
+
+        player_cards: Dict[str, List[str]] = game.player_cards
+        deck: Deque[str] = game.deck
+        discard_pile: Deque[str] = game.discard_pile
 
         game.event = None
 
         if action == "draw_card_from_middle":
-            current_player_id = players[current_player_index]
             if current_player_id != player_id: return game
 
-            selected_card = game.deck.pop()
-            game.player_cards[current_player_id].append(selected_card)
+            selected_card = deck.pop()
+            self._give_card(game, current_player_id, selected_card)
 
             self.set_event(game_id, "draw_card", current_player_id)
 
@@ -328,65 +424,35 @@ class GameManager:
             return game
 
         elif action == "play_card":
-            current_player_id = players[current_player_index]
-
+            card_bit: int = CARD_BIT.get(card, 0) if card is not None else 0
             if (
                     current_player_id != player_id
-                    or card is None
-                    or card not in game.player_cards[current_player_id]
+                    or not card_bit & game.player_hand_masks.get(current_player_id, 0)
             ): return game
 
-            card_color, card_value = retrieve_card_info(card)
-            top_card = game.discard_pile[-1]
-            _, top_card_value = retrieve_card_info(top_card)
-
-            active_color = game.current_active_color
-            is_special_card = card_value in SPECIAL_CARDS or card[2:] in SPECIAL_CARDS
-            is_wild_card = card in WILD_CARDS
+            assert card is not None
+            card_color, card_value, card_flags = CARD_INFO[CARD_ID[card]]
 
-            if is_wild_card or card_color == active_color or card_value == top_card_value:
-                game.discard_pile.append(card)
-                game.player_cards[current_player_id].remove(card)
+            if card_bit & game.active_mask:
+                hand: List[str] = player_cards[current_player_id]
+                discard_pile.append(card)
+                game.top_card_info = (card_color, card_value)
+                self._take_card(game, current_player_id, card)
 
                 self.set_event(game_id, "play_card", current_player_id)
 
-                if len(game.player_cards[current_player_id]) == 0:
+                if len(hand) == 0:
                     self.set_event(game_id, "win", current_player_id)
                     return game
 
-                if not is_wild_card:
+                if not card_flags & CARD_WILD_FLAGS:
                     game.current_active_color = card_color
+                self._refresh_active_mask(game)
 
-                if is_special_card:
-                    if card_value == 'S':
-                        self.advance_turn(game_id)
-                        self.set_event(game_id, "skip", None, game.players[game.current_player_index])
-                    elif card_value == 'R':
-                        self.reverse_direction(game_id)
-                        self.set_event(game_id, "reverse", None)
-                    elif card[2:] == 'D2':
-                        next_p_index = advance_turn_counter(
-                            game.current_player_index,
-                            len(players),
-                            game.direction == 1
-                        )
-                        victim_id = players[next_p_index]
-
-                        for _ in range(2):
-                            if len(game.deck) > 0:
-                                game.player_cards[victim_id].append(game.deck.pop())
-
-                        self.set_event(game_id, "draw2", current_player_id, victim_id)
-                        self.advance_turn(game_id)
-                        return game
-
-                elif is_wild_card:
-                    if 'Wild' in card and 'W4' not in card:
-                        self.set_event(game_id, "wild_color_pick", current_player_id)
-                        return game
-                    elif 'W4' in card:
-                        self.set_event(game_id, "wild_color_pick_draw4", current_player_id)
-                        return game
+                # Action and wild cards carry exactly one effect flag; the effect returns False when the turn must not advance
+                effect = _PLAY_EFFECTS.get(card_flags)
+                if effect is not None and not effect(self, game, game_id, current_player_id):
+                    return game
 
                 self.advance_turn(game_id)
             return game
@@ -395,13 +461,13 @@ class GameManager:
             return self.use_wild_card(card, game_id)
 
         elif action == "change_color_with_wild_and_draw4":
-            player_id_initiator = players[game.current_player_index]
+            player_id_initiator = current_player_id
             self.use_wild_card(card, game_id)
             victim_id = players[game.current_player_index]
 
             for _ in range(4):
-                if len(game.deck) > 0:
-                    game.player_cards[victim_id].append(game.deck.pop())
+                if len(deck) > 0:
+                    self._give_card(game, victim_id, deck.pop())
 
             self.set_event(game_id, "draw4", player_id_initiator, victim_id)
             return game
@@ -415,9 +481,142 @@ class GameManager:
                 return game
 
             if game.game_settings.afk_behavior == AFKBehavior.DRAW_AND_SKIP:
-                print("DRAW AND SKIP (IMPLEMENT LATER)")
+                logger.debug("DRAW AND SKIP (IMPLEMENT LATER)")
 
             self.advance_turn(game_id)
             return game
 
         return game
+
+    def _play_skip(self, game: Game, game_id: str, current_player_id: str) -> bool:
+        """
+        Skips the next player.
+        """
+
+        self.advance_turn(game_id)
+        self.set_event(game_id, "skip", None, game.players[game.current_player_index])
+        return True
+
+    def _play_reverse(self, game: Game, game_id: str, current_player_id: str) -> bool:
+        """
+        Reverses the direction of play.
+        """
+
+        self.reverse_direction(game_id)
+        self.set_event(game_id, "reverse", None)
+        return True
+
+    def _play_draw2(self, game: Game, game_id: str, current_player_id: str) -> bool:
+        """
+        Makes the next player draw two cards and skips them.
+        """
+
+        players: List[str] = game.players
+        victim_id: str = players[(game.current_player_index + game.direction) % len(players)]
+
+        deck: Deque[str] = game.deck
+        for _ in range(2):
+            if len(deck) > 0:
+                self._give_card(game, victim_id, deck.pop())
+
+        self.set_event(game_id, "draw2", current_player_id, victim_id)
+        self.advance_turn(game_id)
+        return False
+
+    def _play_wild(self, game: Game, game_id: str, current_player_id: str) -> bool:
+        """
+        Asks the player to pick a color; the turn advances once they do.
+        """
+
+        self.set_event(game_id, "wild_color_pick", current_player_id)
+        return False
+
+    def _play_wild4(self, game: Game, game_id: str, current_player_id: str) -> bool:
+        """
+        Asks the player to pick a color; the next player draws four once they do.
+        """
+
+        self.set_event(game_id, "wild_color_pick_draw4", current_player_id)
+        return False
+
+    @staticmethod
+    def _set_player_state(game: Game, player_id: str, state: Optional[str]) -> None:
+        """
+        Sets a player's state (None removes it) and keeps the per-state counts in step.
+        """
+
+        state_counts: Dict[str, int] = game.player_state_counts
+        previous: Optional[str] = game.player_states.get(player_id)
+        if previous is not None:
+            state_counts[previous] -= 1
+
+        if state is None:
+            game.player_states.pop(player_id, None)
+        else:
+            game.player_states[player_id] = state
+            state_counts[state] = state_counts.get(state, 0) + 1
+
+    @staticmethod
+    def _give_card(game: Game, player_id: str, card: str) -> None:
+        """
+        Adds a card to a player's hand and marks its face in the hand bitmask.
+        """
+
+        card_id: int = CARD_ID[card]
+        counts: Dict[int, int] = game.player_hand_counts.setdefault(player_id, {})
+        counts[card_id] = counts.get(card_id, 0) + 1
+
+        game.player_cards[player_id].append(card)
+        game.player_hand_masks[player_id] = game.player_hand_masks.get(player_id, 0) | CARD_BIT[card]
+
+    @staticmethod
+    def _set_hand(game: Game, player_id: str, cards: List[str]) -> None:
+        """
+        Replaces a player's hand, rebuilding its card counts and bitmask.
+        """
+
+        counts: Dict[int, int] = {}
+        mask: int = 0
+        for card in cards:
+            card_id: int = CARD_ID[card]
+            counts[card_id] = counts.get(card_id, 0) + 1
+            mask |= CARD_BIT[card]
+
+        game.player_cards[player_id] = cards
+        game.player_hand_counts[player_id] = counts
+        game.player_hand_masks[player_id] = mask
+
+    @staticmethod
+    def _take_card(game: Game, player_id: str, card: str) -> None:
+        """
+        Removes one copy of a card from a player's hand, clearing its bit once no copies remain.
+        """
+
+        card_id: int = CARD_ID[card]
+        counts: Dict[int, int] = game.player_hand_counts[player_id]
+        counts[card_id] -= 1
+        if counts[card_id] == 0:
+            del counts[card_id]
+            game.player_hand_masks[player_id] &= ~CARD_BIT[card]
+
+        # The list only preserves the order the client renders the hand in
+        game.player_cards[player_id].remove(card)
+
+    @staticmethod
+    def _refresh_active_mask(game: Game) -> None:
+        """
+        Recomputes which card faces can be played. Call whenever the top card or active color changes.
+        """
+
+        top_card_value: Optional[str] = game.top_card_info[1] if game.top_card_info else None
+        game.active_mask = playable_mask(game.current_active_color, top_card_value)
+
+
+# Card effect flag -> effect applied after the card is played
+_PLAY_EFFECTS: Dict[int, Callable[[GameManager, Game, str, str], bool]] = {
+    CARD_SKIP: GameManager._play_skip,
+    CARD_REVERSE: GameManager._play_reverse,
+    CARD_DRAW2: GameManager._play_draw2,
+    CARD_WILD: GameManager._play_wild,
+    CARD_WILD4: GameManager._play_wild4,
+}
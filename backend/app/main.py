@@ -6,6 +6,7 @@ from starlette.middleware.cors import CORSMiddleware
 
 from .config import settings
 from .db import engine, Base
+from .responses import ORJSONResponse
 
 @asynccontextmanager
 async def lifespan(app):
@@ -15,7 +16,7 @@ async def lifespan(app):
     await engine.dispose()
 
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -1,14 +1,17 @@
 import uuid
 import enum
-from sqlalchemy import Column, String, BigInteger, DECIMAL, ForeignKey, TIMESTAMP, Date, Enum, Integer
-from sqlalchemy.orm import relationship
+from typing import Optional, Type, Union
+
+from sqlalchemy import Column, String, BigInteger, DECIMAL, ForeignKey, TIMESTAMP, Date, Integer, Index, CheckConstraint, BINARY, cast
+from sqlalchemy.orm import relationship, column_property
 from sqlalchemy.sql import func
+from sqlalchemy.types import TypeDecorator
 
 from app.db import Base
 
 
 
-class TransactionType(enum.Enum):
+class TransactionType(str, enum.Enum):
     DEPOSIT = "DEPOSIT"
     WITHDRAWAL = "WITHDRAWAL"
     GAME_BUY_IN = "GAME_BUY_IN"
@@ -17,58 +20,110 @@ class TransactionType(enum.Enum):
     DAILY_REWARD = "DAILY_REWARD"
 
 
-class GameSessionStatus(enum.Enum):
+class GameSessionStatus(str, enum.Enum):
     WAITING = "WAITING"
     IN_PROGRESS = "IN_PROGRESS"
     COMPLETED = "COMPLETED"
     CANCELLED = "CANCELLED"
 
 
-class CatalogStatus(enum.Enum):
+class CatalogStatus(str, enum.Enum):
     ACTIVE = "ACTIVE"
     MAINTENANCE = "MAINTENANCE"
     COMING_SOON = "COMING_SOON"
 
 
-class UserRole(enum.Enum):
+class UserRole(str, enum.Enum):
     USER = "USER"
     ADMIN = "ADMIN"
 
 
-class UserStatus(enum.Enum):
+class UserStatus(str, enum.Enum):
     ACTIVE = "ACTIVE"
     SUSPENDED = "SUSPENDED"
     DEACTIVATED = "DEACTIVATED"
 
-class SessionType(enum.Enum):
+class SessionType(str, enum.Enum):
     PUBLIC = "PUBLIC"
     PRIVATE = "PRIVATE"
 
+class UUIDBinary(TypeDecorator):
+    """
+    UUID stored as BINARY(16) instead of its 36-character text, which keeps primary keys and every index
+    that references them less than half the size. The application keeps working with UUID strings.
+    """
+
+    impl = BINARY(16)
+    cache_ok = True
+
+    def process_bind_param(self, value: Union[str, uuid.UUID, None], dialect) -> Optional[bytes]:
+        if value is None:
+            return None
+        if not isinstance(value, uuid.UUID):
+            value = uuid.UUID(value)
+        return value.bytes
+
+    def process_result_value(self, value: Optional[bytes], dialect) -> Optional[str]:
+        if value is None:
+            return None
+        return str(uuid.UUID(bytes=value))
+
+
+def one_of(column: str, values: Type[enum.Enum], name: str) -> CheckConstraint:
+    """
+    CHECK constraint limiting a string column to the values of an enum.
+    """
+
+    allowed: str = ", ".join(f"'{member.value}'" for member in values)
+    return CheckConstraint(f"{column} IN ({allowed})", name=name)
+
+
+# Enumerated columns are stored as short VARCHARs guarded by CHECK constraints rather than MySQL ENUMs,
+# so adding a value doesn't rebuild the table. The enums mix in str, so the strings read back compare equal to
+# their members; write and filter with `.value`, since the driver would render a member as 'Class.NAME'
+
 class User(Base):
     __tablename__ = "users"
-
-    user_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    username = Column(String(50), unique=True, nullable=False)
-    email = Column(String(100), unique=True, nullable=False)
+    # Named unique B-tree indexes back the login/registration lookups (instead of implicit column-level UNIQUE keys)
+    __table_args__ = (
+        Index("ix_users_username", "username", unique=True, mysql_using="btree"),
+        Index("ix_users_email", "email", unique=True, mysql_using="btree"),
+        one_of("role", UserRole, "ck_users_role"),
+        one_of("status", UserStatus, "ck_users_status"),
+    )
+
+    user_id = Column(UUIDBinary, primary_key=True, default=lambda: str(uuid.uuid4()))
+    username = Column(String(50), nullable=False)
+    email = Column(String(100), nullable=False)
     birthday = Column(Date, nullable=False)
     password_hash = Column(String(255), nullable=False)
     current_balance = Column(DECIMAL(15, 2), default=0.00)
-    role = Column(Enum(UserRole), default=UserRole.USER)
-    status = Column(Enum(UserStatus), default=UserStatus.ACTIVE)
+    # Balance as integer cents, computed by the database so display paths never build a Decimal.
+    # Deferred: only loaded when selected explicitly
+    balance_cents = column_property(cast(current_balance * 100, BigInteger), deferred=True)
+    role = Column(String(16), nullable=False, default=UserRole.USER.value)
+    status = Column(String(16), nullable=False, default=UserStatus.ACTIVE.value)
     created_at = Column(TIMESTAMP, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
 
-    transactions = relationship("WalletTransaction", back_populates="user")
-    hosted_games = relationship("GameSession", foreign_keys="GameSession.host_user_id", back_populates="host")
+    # Collections raise on lazy access, so callers have to pick a loader (see app/queries/user.py) instead of
+    # silently issuing one query per user
+    transactions = relationship("WalletTransaction", back_populates="user", lazy="raise")
+    hosted_games = relationship("GameSession", foreign_keys="GameSession.host_user_id", back_populates="host", lazy="raise")
 
 
 class GameCatalog(Base):
     __tablename__ = "game_catalog"
+    # The catalog is listed ordered by creation time; the index spares MySQL a filesort
+    __table_args__ = (
+        Index("ix_game_catalog_created_at", "created_at"),
+        one_of("status", CatalogStatus, "ck_game_catalog_status"),
+    )
 
     game_type_id = Column(String(20), primary_key=True)
     display_name = Column(String(50), nullable=False)
     description = Column(String(255), nullable=False)
-    status = Column(Enum(CatalogStatus), default=CatalogStatus.COMING_SOON)
+    status = Column(String(16), nullable=False, default=CatalogStatus.COMING_SOON.value)
     image_asset = Column(String(50), nullable=False)
     frontend_route = Column(String(50), nullable=False)
     min_players = Column(Integer, default=2)
@@ -80,13 +135,19 @@ class GameCatalog(Base):
 
 class GameSession(Base):
     __tablename__ = "game_sessions"
-
-    session_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    __table_args__ = (
+        # Lobby listings filter on status and room type and list the rooms by age
+        Index("ix_game_sessions_status_type_created", "status", "room_type", "created_at"),
+        one_of("room_type", SessionType, "ck_game_sessions_room_type"),
+        one_of("status", GameSessionStatus, "ck_game_sessions_status"),
+    )
+
+    session_id = Column(UUIDBinary, primary_key=True, default=lambda: str(uuid.uuid4()))
     game_type_id = Column(String(20), ForeignKey("game_catalog.game_type_id"), nullable=False)
     room_code = Column(String(10), unique=True, nullable=False)
-    host_user_id = Column(String(36), ForeignKey("users.user_id"), nullable=False)
-    room_type = Column(Enum(SessionType), default=SessionType.PUBLIC)
-    status = Column(Enum(GameSessionStatus), default=GameSessionStatus.WAITING)
+    host_user_id = Column(UUIDBinary, ForeignKey("users.user_id"), nullable=False)
+    room_type = Column(String(16), nullable=False, default=SessionType.PUBLIC.value)
+    status = Column(String(16), nullable=False, default=GameSessionStatus.WAITING.value)
     current_players = Column(Integer, default=1)
     max_players = Column(Integer, nullable=False, default=10)
     buy_in_amount = Column(DECIMAL(10, 2), nullable=False, default=0.00)
@@ -101,12 +162,15 @@ class GameSession(Base):
 
 class WalletTransaction(Base):
     __tablename__ = "wallet_transactions"
+    __table_args__ = (
+        one_of("transaction_type", TransactionType, "ck_wallet_transactions_type"),
+    )
 
     transaction_id = Column(BigInteger, primary_key=True, autoincrement=True)
-    user_id = Column(String(36), ForeignKey("users.user_id"), nullable=False)
+    user_id = Column(UUIDBinary, ForeignKey("users.user_id"), nullable=False)
     amount = Column(DECIMAL(15, 2), nullable=False)
-    transaction_type = Column(Enum(TransactionType), nullable=False)
-    reference_id = Column(String(36), nullable=True)
+    transaction_type = Column(String(16), nullable=False)
+    reference_id = Column(UUIDBinary, nullable=True)
     description = Column(String(255), nullable=True)
     created_at = Column(TIMESTAMP, server_default=func.now())
 
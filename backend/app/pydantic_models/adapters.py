@@ -0,0 +1,11 @@
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app.pydantic_models.outgoing.game_option import GameOption
+from app.pydantic_models.outgoing.user_profile import UserProfile
+
+
+# Adapters for the outgoing models, built once at import so routes only validate and serialize
+GAME_OPTION_LIST: TypeAdapter = TypeAdapter(List[GameOption])
+USER_PROFILE: TypeAdapter = TypeAdapter(UserProfile)
@@ -1,4 +1,5 @@
-from typing import List, Dict, Optional
+from collections import deque
+from typing import Deque, List, Dict, Optional, Set, Tuple
 
 from pydantic import BaseModel
 
@@ -10,13 +11,20 @@ class Game(BaseModel):
     game_settings: GameSettings
     state: str
     players: List[str]
+    player_set: Set[str] = set()
     player_names: Dict[str, str]
     player_states: Dict[str, str]
+    player_state_counts: Dict[str, int] = {}  # Number of players in each state, kept in step with player_states
     player_skips: Dict[str, int] = {}
     current_player_index: Optional[int] = None
     current_active_color: Optional[str] = None
     direction: int
     event: Optional[Dict[str, Optional[str]]] = None
-    deck: List[str] = []
-    discard_pile: List[str] = []
+    deck: Deque[str] = deque()
+    discard_pile: Deque[str] = deque()
+    top_card_info: Optional[Tuple[str, str]] = None
     player_cards: Dict[str, List[str]] = {}
+    player_hand_counts: Dict[str, Dict[int, int]] = {}
+    player_hand_masks: Dict[str, int] = {}
+    active_mask: int = 0
+    version: int = 0  # Changes on every observable mutation, so unchanged state isn't re-sent
@@ -1,5 +1,8 @@
 from enum import Enum
-from pydantic import BaseModel, Field, field_validator
+from typing import Literal, Optional
+
+import orjson
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, field_validator
 
 
 class StackingMode(str, Enum):
@@ -17,7 +20,16 @@ class AFKBehavior(str, Enum):
     SKIP = "skip"  # Player skips their turn
 
 
+# The enums name the values for game logic; the fields use the matching Literal types,
+# which pydantic checks as plain string membership instead of enum coercion
+StackingModeValue = Literal["off", "standard", "aggressive"]
+AFKBehaviorValue = Literal["draw_skip", "skip"]
+
+
 class GameSettings(BaseModel):
+    # Settings are replaced as a whole, never mutated
+    model_config = ConfigDict(frozen=True)
+
     # Time Limit (with validation)
     turn_timeout_seconds: int = Field(
         default=30,
@@ -27,14 +39,14 @@ class GameSettings(BaseModel):
     )
 
     # Stacking Rules
-    stacking_mode: StackingMode = Field(
-        default=StackingMode.STANDARD,
+    stacking_mode: StackingModeValue = Field(
+        default=StackingMode.STANDARD.value,
         description="Rules regarding stacking Draw 2s and Draw 4s."
     )
 
     # AFK / Penalty Logic
-    afk_behavior: AFKBehavior = Field(
-        default=AFKBehavior.DRAW_AND_SKIP,
+    afk_behavior: AFKBehaviorValue = Field(
+        default=AFKBehavior.DRAW_AND_SKIP.value,
         description="Action taken when timer expires."
     )
 
@@ -48,3 +60,12 @@ class GameSettings(BaseModel):
         default=True,
         description="Whether to kick the player after they reach the maximum number of strikes."
     )
+
+    # Encoded form, built on first use. Settings are replaced as a whole, never mutated, so it never goes stale
+    _json: Optional[bytes] = PrivateAttr(default=None)
+
+    def to_json(self) -> bytes:
+        """Returns the settings encoded as JSON, encoding them only once."""
+        if self._json is None:
+            self._json = orjson.dumps(self.model_dump())
+        return self._json
@@ -1,6 +1,6 @@
 from typing import Optional, List, Dict
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class GameState(BaseModel):
@@ -8,6 +8,8 @@ class GameState(BaseModel):
     Formats data for the frontend
     """
 
+    model_config = ConfigDict(frozen=True)
+
     event: Optional[str] = None
     game_id: Optional[str] = None
     current_active_color: Optional[str] = None
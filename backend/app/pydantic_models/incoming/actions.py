@@ -0,0 +1,72 @@
+from typing import Any, Dict, FrozenSet, Optional, Union
+
+import msgspec
+
+
+class Action(msgspec.Struct, tag_field="action"):
+    """
+    Base for the inbound websocket actions; the "action" field picks the subclass.
+    """
+
+
+class CreateGameExtra(msgspec.Struct):
+    is_private: bool = False
+    max_players: int = 10
+    buy_in: float = 1.00
+
+
+class SaveGameSettingsExtra(msgspec.Struct):
+    settings: Dict[str, Any] = {}
+
+
+class ProcessTurnExtra(msgspec.Struct):
+    action: Optional[str] = None
+    card: Optional[str] = None
+    advance_turn: bool = True
+
+
+class StatusCheck(Action, tag="status_check"):
+    pass
+
+
+class CreateGame(Action, tag="create_game"):
+    extra: CreateGameExtra = msgspec.field(default_factory=CreateGameExtra)
+
+
+class SaveGameSettings(Action, tag="save_game_settings"):
+    extra: SaveGameSettingsExtra = msgspec.field(default_factory=SaveGameSettingsExtra)
+
+
+class JoinGame(Action, tag="join_game"):
+    game_id: str = ""
+
+
+class LeaveGame(Action, tag="leave_game"):
+    pass
+
+
+class StartGame(Action, tag="start_game"):
+    pass
+
+
+class EndGame(Action, tag="end_game"):
+    pass
+
+
+class BackToLobby(Action, tag="back_to_lobby"):
+    pass
+
+
+class ProcessTurn(Action, tag="process_turn"):
+    extra: ProcessTurnExtra = msgspec.field(default_factory=ProcessTurnExtra)
+
+
+InboundAction = Union[
+    StatusCheck, CreateGame, SaveGameSettings, JoinGame, LeaveGame, StartGame, EndGame, BackToLobby, ProcessTurn
+]
+
+ACTION_NAMES: FrozenSet[str] = frozenset(cls.__struct_config__.tag for cls in InboundAction.__args__)
+
+# Decode and validate a frame straight into its action Struct, in either wire format
+json_action_decoder = msgspec.json.Decoder(InboundAction)
+msgpack_action_decoder = msgspec.msgpack.Decoder(InboundAction)
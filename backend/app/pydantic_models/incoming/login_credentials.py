@@ -1,7 +1,9 @@
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, ConfigDict, field_validator
 
 
 class LoginCredentials(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     username: str
     password: str
 
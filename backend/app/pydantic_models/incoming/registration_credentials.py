@@ -1,14 +1,14 @@
 from datetime import date
-from pydantic import BaseModel, field_validator, model_validator, EmailStr
-
-from app.utils import str_to_date_iso
+from pydantic import BaseModel, ConfigDict, field_validator, model_validator, EmailStr
 
 
 class RegistrationCredentials(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     username: str
     password: str
     email: EmailStr
-    birthday: str
+    birthday: date
 
     @field_validator('username')
     def username_length(cls, v):
@@ -28,18 +28,19 @@ class RegistrationCredentials(BaseModel):
             raise ValueError("Username and email cannot be the same.")
         return self
 
-    @field_validator('birthday')
+    @field_validator('birthday', mode= 'before')
     def birthday_validations(cls, v):
-        birthday_iso = str_to_date_iso(v)
+        # Parsed here once with the C-level ISO parser; the route receives the date itself
+        try:
+            birthday_iso = v if isinstance(v, date) else date.fromisoformat(v)
+        except (TypeError, ValueError):
+            raise ValueError("Invalid date format. Please use YYYY-MM-DD.")
 
-        if birthday_iso:
-            today = date.today()
-            age = today.year - birthday_iso.year - (
-                    (today.month, today.day) < (birthday_iso.month, birthday_iso.day)
-            )
+        today = date.today()
+        age = today.year - birthday_iso.year - (
+                (today.month, today.day) < (birthday_iso.month, birthday_iso.day)
+        )
 
-            if age < 18:
-                raise ValueError("You must be at least 18 years old to register.")
-        else:
-            raise ValueError("Invalid date format. Please use YYYY-MM-DD.")
-        return v
\ No newline at end of file
+        if age < 18:
+            raise ValueError("You must be at least 18 years old to register.")
+        return birthday_iso
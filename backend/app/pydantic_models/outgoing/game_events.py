@@ -0,0 +1,50 @@
+from typing import Dict, List, Optional, Union
+
+import msgspec
+from msgspec import UNSET, UnsetType
+
+
+# Shared encoder for the hot server -> client events; msgspec specialises it per Struct type
+json_encoder = msgspec.json.Encoder()
+
+
+class GameUpdate(msgspec.Struct):
+    """
+    The part of a game update shared by every player.
+    Fields left UNSET didn't change since the player's last update and are omitted from the JSON.
+    """
+
+    event: str
+    game_id: str
+    seq: int
+    full: bool
+    game_event: Optional[Dict[str, Optional[str]]]
+    current_active_color: Union[Optional[str], UnsetType] = UNSET
+    direction: Union[int, UnsetType] = UNSET
+    top_card: Union[Optional[str], UnsetType] = UNSET
+    current_player: Union[Optional[str], UnsetType] = UNSET
+    player_states: Union[Dict[str, str], UnsetType] = UNSET
+
+
+class PlayerView(msgspec.Struct):
+    """
+    The personal part of a game update.
+    """
+
+    hand: Union[List[str], UnsetType] = UNSET
+    card_counts: Union[Dict[str, int], UnsetType] = UNSET
+
+
+class LobbyUpdate(msgspec.Struct):
+    games: List[Dict]
+    event: str = "lobby_update"
+
+
+class PlayerJoined(msgspec.Struct):
+    gameId: str
+    players: List[str]
+    playerNames: Dict[str, str]
+    hostId: str
+    playerStates: Dict[str, str]
+    message: str
+    event: str = "player_joined"
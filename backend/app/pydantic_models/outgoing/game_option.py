@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import BaseModel, ConfigDict
 from enum import Enum
 
@@ -9,11 +11,13 @@ class CatalogStatus(str, Enum):
     MAINTENANCE = "MAINTENANCE"
     COMING_SOON = "COMING_SOON"
 
+CatalogStatusValue = Literal["ACTIVE", "MAINTENANCE", "COMING_SOON"]
+
 class GameOption(BaseModel):
     game_type_id: str
     display_name: str
     description: str
-    status: CatalogStatus
+    status: CatalogStatusValue
     image_asset: str
     frontend_route: str
     min_players: int
@@ -21,6 +25,7 @@ class GameOption(BaseModel):
 
     model_config = ConfigDict(
         from_attributes=True,
+        frozen=True,
         alias_generator=to_camel,
         populate_by_name=True
     )
\ No newline at end of file
@@ -14,6 +14,7 @@ class UserProfile(BaseModel):
 
     model_config = ConfigDict(
         from_attributes=True,
+        frozen=True,
         alias_generator=to_camel,
         populate_by_name=True
     )
\ No newline at end of file
@@ -0,0 +1,22 @@
+from sqlalchemy import Select, select
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.interfaces import LoaderOption
+
+from app.models import GameSession, User
+
+
+def hosted_games_loader(*columns) -> LoaderOption:
+    """
+    Loader option that fetches User.hosted_games in one extra SELECT for all loaded users.
+    Only the given GameSession columns are loaded (the session ID and status by default).
+    """
+
+    return selectinload(User.hosted_games).load_only(*(columns or (GameSession.session_id, GameSession.status)))
+
+
+def select_user_with_hosted_games(user_id: str, *columns) -> Select:
+    """
+    Selects a user together with their hosted games.
+    """
+
+    return select(User).options(hosted_games_loader(*columns)).where(User.user_id == user_id)
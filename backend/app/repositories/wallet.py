@@ -0,0 +1,38 @@
+from typing import Dict, List
+
+from sqlalchemy import BigInteger, bindparam, insert, literal_column, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import User, WalletTransaction
+
+
+# Cents are scaled to the DECIMAL(15, 2) balance in SQL, so the update is atomic and Decimal-free in Python
+_ADJUST_BALANCE_STMT = (
+    update(User)
+    .where(User.user_id == bindparam("user_id"))
+    .values(current_balance=User.current_balance + bindparam("delta_cents", type_=BigInteger) / literal_column("100"))
+    # Loaded User objects are not synchronized, which would cost an extra SELECT on MySQL
+    .execution_options(synchronize_session=False)
+)
+
+
+async def record_transactions_bulk(db: AsyncSession, rows: List[Dict]) -> None:
+    """
+    Inserts a batch of wallet transactions (e.g. every buy-in of a game) in one round trip.
+    Passing the rows as a list makes SQLAlchemy expand them into a multi-row INSERT ... VALUES.
+    The caller commits.
+    """
+
+    if not rows:
+        return
+
+    await db.execute(insert(WalletTransaction), rows)
+
+
+async def adjust_balance_cents(db: AsyncSession, user_id: str, delta_cents: int) -> None:
+    """
+    Adds delta_cents (negative to charge) to a user's balance in a single UPDATE.
+    The caller commits.
+    """
+
+    await db.execute(_ADJUST_BALANCE_STMT, {"user_id": user_id, "delta_cents": delta_cents})
@@ -1,5 +1,7 @@
+import logging
+
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select, or_
+from sqlalchemy import bindparam, exists, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 
@@ -10,67 +12,78 @@ from app.pydantic_models.incoming.registration_credentials import RegistrationCr
 
 
 from app.db import get_session
-from app.security import hash_password, verify_password, create_access_token
-from app.utils import str_to_date_iso
+from app.security import hash_password, verify_and_update_password, create_access_token
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Statements are built once; requests only bind their values
+_LOGIN_STMT = select(User.user_id, User.username, User.password_hash, User.role).where(
+    User.username == bindparam("username")
+)
+_USERNAME_TAKEN_STMT = select(exists().where(User.username == bindparam("username")))
+_EMAIL_TAKEN_STMT = select(exists().where(User.email == bindparam("email")))
+_REHASH_STMT = (
+    update(User)
+    .where(User.user_id == bindparam("user_id"))
+    .values(password_hash=bindparam("password_hash"))
+    .execution_options(synchronize_session=False)
+)
 
 
 @router.post("/login")
 async def login(login_credentials: LoginCredentials, db: AsyncSession = Depends(get_session)):
-    existing_user_statement = select(User).where(User.username == login_credentials.username)
-    result = await db.execute(existing_user_statement)
-    existing_user = result.scalars().first()
+    # Only the columns needed to check the password and mint the token, as a plain row
+    result = await db.execute(_LOGIN_STMT, {"username": login_credentials.username})
+    existing_user = result.first()
 
     if not existing_user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    unhashed_pw = verify_password(login_credentials.password, existing_user.password_hash)
+    user_id, username, password_hash, role = existing_user
+
+    unhashed_pw, new_hash = await verify_and_update_password(login_credentials.password, password_hash)
     if not unhashed_pw:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    if new_hash:
+        # Legacy bcrypt hash: store the argon2id one now that the plain password is known
+        await db.execute(_REHASH_STMT, {"user_id": user_id, "password_hash": new_hash})
+        await db.commit()
+
     access_token = create_access_token(
-        data={"sub": existing_user.username, "id": existing_user.user_id }
+        data={"sub": username, "id": user_id }
     )
 
     return {
         "access_token": access_token,
         "token_type": "bearer",
-        "user_role": existing_user.role
+        "user_role": role
     }
 
 @router.post("/register")
 async def register(registration_credentials: RegistrationCredentials, db: AsyncSession = Depends(get_session)):
-    existing_user_statement = select(User).where(
-        or_(
-            User.username == registration_credentials.username,
-            User.email == registration_credentials.email
-        )
-    )
-    result = await db.execute(existing_user_statement)
-    existing_user = result.scalars().first()
-
-    if existing_user:
-        if existing_user.username == registration_credentials.username:
-            detail_msg = "Username already taken."
-        else:
-            detail_msg = "Email already registered."
+    # Two EXISTS probes, each served by its own unique index, rather than one OR query
+    username_taken: bool = await db.scalar(_USERNAME_TAKEN_STMT, {"username": registration_credentials.username})
+    if username_taken:
+        raise HTTPException(status_code=400, detail="Username already taken.")
 
-        raise HTTPException(status_code=400, detail=detail_msg)
+    email_taken: bool = await db.scalar(_EMAIL_TAKEN_STMT, {"email": str(registration_credentials.email)})
+    if email_taken:
+        raise HTTPException(status_code=400, detail="Email already registered.")
 
     try:
-        hashed_pw = hash_password(registration_credentials.password)
+        hashed_pw = await hash_password(registration_credentials.password)
 
         new_user = User(
             username= registration_credentials.username,
             email= str(registration_credentials.email),
-            birthday= str_to_date_iso(registration_credentials.birthday),
+            birthday= registration_credentials.birthday,
             password_hash= hashed_pw
         )
 
         db.add(new_user)
         await db.commit()
-        await db.refresh(new_user)
 
         return {
             "message": "User created successfully",
@@ -83,6 +96,6 @@ async def register(registration_credentials: RegistrationCredentials, db: AsyncS
         raise HTTPException(status_code=400, detail="User already exists.")
 
     except Exception as e:
-        print(f"Registration Error: {e}")
+        logger.exception("Registration error: %s", e)
         await db.rollback()
         raise HTTPException(status_code=500, detail="Internal Server Error")
\ No newline at end of file
@@ -1,18 +1,37 @@
-from typing import List
+import time
+from typing import List, Optional, Tuple
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db import get_session
 from app.models import GameCatalog, User
+from app.pydantic_models.adapters import GAME_OPTION_LIST
 from app.pydantic_models.outgoing.game_option import GameOption
 from app.security import get_current_user
 
 router = APIRouter()
 
-@router.get("/catalog", response_model= List[GameOption])
+# The catalog changes a few times a day at most and is the same for every user,
+# so its serialized JSON is kept in memory for a short while
+CATALOG_TTL_SECONDS: float = 60.0
+_catalog_cache: Optional[Tuple[float, bytes]] = None
+
+_CATALOG_STMT = select(GameCatalog).order_by(GameCatalog.created_at)
+
+# The response is already serialized, so the model is only declared for the OpenAPI docs
+@router.get("/catalog", responses={200: {"model": List[GameOption]}})
 async def catalog(db: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
-    query_result = await db.execute(select(GameCatalog).order_by(GameCatalog.created_at))
-    game_catalog = query_result.scalars().all()
-    return game_catalog
+    global _catalog_cache
+
+    if _catalog_cache is not None and time.monotonic() - _catalog_cache[0] < CATALOG_TTL_SECONDS:
+        return Response(content=_catalog_cache[1], media_type="application/json")
+
+    query_result = await db.execute(_CATALOG_STMT)
+    game_catalog = GAME_OPTION_LIST.validate_python(query_result.scalars().all(), from_attributes=True)
+
+    payload: bytes = GAME_OPTION_LIST.dump_json(game_catalog, by_alias=True)
+    _catalog_cache = (time.monotonic(), payload)
+
+    return Response(content=payload, media_type="application/json")
@@ -1,32 +1,90 @@
-import enum
-import json
-from typing import Optional, Dict
+import asyncio
+import msgspec
+import orjson
+from typing import Any, Awaitable, Callable, Optional, Dict, Set, Tuple, Type
 
+from cachetools import TTLCache
 from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect, status
+from sqlalchemy import bindparam, case, insert, update
 from sqlalchemy.future import select
 
 
 from app.security import verify_token
-from app.db import async_session
+from app.utils import normalize_game_id
+from app.db import async_session, engine
 from app.models import GameSession, GameSessionStatus, User, SessionType
 
+from app.connection_manager import DECODE_ERRORS
 from app.dependencies import connection_manager, game_manager
 from app.pydantic_models.game import Game
-from app.utils import generate_game_id
+from app.pydantic_models.incoming.actions import (
+    ACTION_NAMES,
+    Action,
+    BackToLobby,
+    CreateGame,
+    EndGame,
+    JoinGame,
+    LeaveGame,
+    ProcessTurn,
+    ProcessTurnExtra,
+    SaveGameSettings,
+    StartGame,
+    StatusCheck,
+    json_action_decoder,
+    msgpack_action_decoder
+)
+from app.pydantic_models.outgoing.game_events import PlayerJoined, json_encoder
 from app.websocket_utils import (
     broadcast_lobby_state,
     broadcast_to_room,
     send_game_update,
-    get_database_lobby_info
+    get_lobby_frame,
+    invalidate_lobby_cache
 )
 
 
 router = APIRouter()  # /games/SOLO
 
+# Error frames only differ by message, so the envelope is a fixed template
+ERROR_TEMPLATE: bytes = b'{"event":"error","message":%b}'
+
+# (user_id, username) of recently authenticated users by username, so reconnects skip the user lookup
+_users_by_name: TTLCache = TTLCache(maxsize=10000, ttl=60)
+
+# Strong references to fire-and-forget cleanup tasks, which the event loop only holds weakly
+_background_tasks: Set[asyncio.Task] = set()
+
+# Player count changes are single atomic UPDATEs, so concurrent joins/leaves can't overwrite each other.
+# status is assigned first: MySQL evaluates SET left to right, so it still sees the old player count
+_JOIN_SESSION_STMT = (
+    update(GameSession)
+    .where(GameSession.room_code == bindparam("room_code"))
+    .ordered_values(
+        (GameSession.status, case(
+            (GameSession.current_players + 1 >= GameSession.max_players, GameSessionStatus.IN_PROGRESS.value),
+            else_=GameSession.status
+        )),
+        (GameSession.current_players, GameSession.current_players + 1),
+    )
+    .execution_options(synchronize_session=False)
+)
+_LEAVE_SESSION_STMT = (
+    update(GameSession)
+    .where(GameSession.room_code == bindparam("room_code"))
+    .ordered_values(
+        (GameSession.status, case(
+            (GameSession.current_players - 1 <= 0, GameSessionStatus.CANCELLED.value),
+            else_=GameSession.status
+        )),
+        (GameSession.current_players, GameSession.current_players - 1),
+    )
+    .execution_options(synchronize_session=False)
+)
+
 
-async def get_current_user_ws(token: str) -> Optional[User]:
+async def get_current_user_ws(token: str) -> Optional[Tuple[str, str]]:
     """
-    Validates the JWT token and returns the user object.
+    Validates the JWT token and returns the user's (user_id, username).
     """
     try:
         payload = verify_token(token)  # JWT decode function
@@ -34,10 +92,20 @@ async def get_current_user_ws(token: str) -> Optional[User]:
         if not username:
             return None
 
-        async with async_session() as session:
-            result = await session.execute(select(User).where(User.username == username))
-            user = result.scalar_one_or_none()
+        user: Optional[Tuple[str, str]] = _users_by_name.get(username)
+        if user is not None:
             return user
+
+        async with async_session() as session:
+            result = await session.execute(select(User.user_id, User.username).where(User.username == username))
+            row = result.one_or_none()
+
+        if row is None:
+            return None
+
+        user = (str(row.user_id), row.username)
+        _users_by_name[username] = user
+        return user
     except Exception as e:
         print(f"Auth Error: {e}")
         return None
@@ -46,245 +114,322 @@ async def get_current_user_ws(token: str) -> Optional[User]:
 @router.websocket("/ws")
 async def websocket_endpoint(
         websocket: WebSocket,
-        token: str = Query(...)
+        token: Optional[str] = Query(None)
 ) -> None:
     """
     Authenticated WebSocket endpoint for SOLO game lobby and gameplay.
+    The token is read from the auth subprotocol, or from the query string for older clients.
     """
 
-    # Authenticate before accepting
-    user = await get_current_user_ws(token)
+    # Authenticate before accepting. Verified tokens and their users are cached, so reconnects skip the DB
+    token = token or connection_manager.subprotocol_token(websocket)
+    user = await get_current_user_ws(token) if token else None
 
     if not user:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
 
-    client_id = str(user.user_id)
-    client_display_name = user.username
+    client_id, client_display_name = user
 
     # Accept Connection
     await connection_manager.connect(websocket, client_id, client_display_name)
 
     # Send Initial Lobby State
-    initial_lobby_data = await get_database_lobby_info()
-    await connection_manager.send_personal_message(json.dumps({
-        "event": "lobby_update",
-        "games": initial_lobby_data
-    }), client_id)
+    await connection_manager.send_personal_message(await get_lobby_frame(), client_id)
 
-    current_game_id: Optional[str] = None
+    ctx = ClientContext(client_id, client_display_name)
 
     try:
-        await connection_manager.send_personal_message(json.dumps({
+        await connection_manager.send_personal_message(orjson.dumps({
             "event": "system",
             "message": f"Welcome {client_display_name}. Connection Established."
         }), client_id)
 
         while True:
-            data = await websocket.receive_text()
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", status.WS_1000_NORMAL_CLOSURE))
+            data = message["text"] if message.get("text") is not None else message.get("bytes")
 
             try:
-                payload = json.loads(data)
-                action: str = payload.get("action")
-                extra: Dict = payload.get("extra")
-
-                if action == "status_check":
-                    await broadcast_lobby_state()
-
-                elif action == "create_game":
-
-                    is_private: bool = extra.get("is_private", False)
-                    room_type: enum.Enum = SessionType.PRIVATE if is_private else SessionType.PUBLIC
-
-                    max_players: int = extra.get("max_players", 10)
-                    buy_in_fee: float = extra.get("buy_in", 1.00)
-
-                    new_game_id: str = generate_game_id()
-                    while game_manager.get_game(new_game_id):
-                        new_game_id = generate_game_id()
-
-                    game_manager.create_game(new_game_id, client_id, client_display_name)
-                    current_game_id = new_game_id
-
-                    async with async_session() as session:
-                        try:
-                            new_session = GameSession(
-                                game_type_id= "SOLO",
-                                room_code= new_game_id,
-                                host_user_id= client_id,
-                                room_type= room_type,
-                                status= GameSessionStatus.WAITING,
-                                current_players= 1,
-                                max_players= max_players,
-                                buy_in_amount= buy_in_fee
-                            )
-                            session.add(new_session)
-                            await session.commit()
-                        except Exception as e:
-                            await session.rollback()
-                            print(f"DB Error creating game: {e}")
-
-                    await broadcast_lobby_state()
-
-                    game_state: Optional[Game] = game_manager.get_game(new_game_id)
-                    if not game_state:
-                        raise Exception("Failed to retrieve game state after creation.")
-
-                    response = {
-                        "event": "game_created",
-                        "gameId": new_game_id,
-                        "creator": client_id,
-                        "players": game_state.players,
-                        "playerNames": game_state.player_names,
-                        "playerStates": game_state.player_states,
-                        "message": f"Room {new_game_id} created."
-                    }
-                    await connection_manager.send_personal_message(json.dumps(response), client_id)
-
-                elif action == "save_game_settings":
-                    if current_game_id:
-                        settings: Dict = extra.get("settings")
-                        game_state: Optional[Game] = game_manager.update_game_settings(current_game_id, settings)
-
-                        if game_state is not None:
-                            response = {
-                                "event": "game_settings_saved",
-                                "settings": game_state.game_settings.model_dump()
-                            }
-                            await broadcast_to_room(current_game_id, response)
-
-                elif action == "join_game":
-                    target_id: str = payload.get("game_id", "").upper()
-
-                    if not target_id:
-                        raise Exception("Invalid game ID.")
-
-                    game_state: Optional[Game] = game_manager.join_game(target_id, client_id, client_display_name)
-                    if game_state:
-                        current_game_id = target_id
-
-                        async with async_session() as session:
-                            try:
-                                result = await session.execute(
-                                    select(GameSession).where(GameSession.room_code == target_id)
-                                )
-                                session_row = result.scalar_one_or_none()
-
-                                if session_row:
-                                    session_row.current_players += 1
-                                    if session_row.current_players >= session_row.max_players:
-                                        session_row.status = GameSessionStatus.IN_PROGRESS
-                                    await session.commit()
-                            except Exception as e:
-                                await session.rollback()
-                                print(f"DB Error joining game: {e}")
-
-                        await broadcast_lobby_state()
-
-                        room_update = {
-                            "event": "player_joined",
-                            "gameId": target_id,
-                            "players": game_state.players,
-                            "playerNames": game_state.player_names,
-                            "hostId": game_state.host_id,
-                            "playerStates": game_state.player_states,
-                            "message": f"{client_display_name} has joined the game"
-                        }
-
-                        await broadcast_to_room(target_id, room_update)
-
-                        response = {
-                            "event": "game_joined",
-                            "gameId": target_id,
-                            "hostId": game_state.host_id,
-                            "players": game_state.players,
-                            "playerNames": game_state.player_names,
-                            "playerStates": game_state.player_states,
-                        }
-
-                        await connection_manager.send_personal_message(json.dumps(response), client_id)
-
-                elif action == "leave_game":
-                    if current_game_id:
-                        await leave_lobby(current_game_id, client_id, client_display_name)
-                        current_game_id = None
-
-                elif action == "start_game":
-                    if current_game_id:
-                        game_state: Optional[Game] = game_manager.start_game(current_game_id)
-                        if game_state:
-                            await send_game_update(game_state, current_game_id, "game_started")
-
-                elif action == "end_game":
-                    if current_game_id:
-                        game_manager.end_game(current_game_id)
-
-                elif action == "back_to_lobby":
-                    if current_game_id:
-                        game_state: Optional[Game] = game_manager.set_player_back_to_lobby(current_game_id, client_id)
-                        if game_state:
-                            await broadcast_to_room(current_game_id, {
-                                "event": "player_back_to_lobby",
-                                "player_states": game_state.player_states
-                            })
-
-                elif action == "process_turn":
-                    if current_game_id:
-                        turn_action: Optional[str] = extra.get("action") if extra else None
-                        card: Optional[str] = extra.get("card") if extra else None
-                        advance_turn: bool = extra.get("advance_turn", True)
-
-                        game_state: Optional[Game] = game_manager.process_turn(client_id, current_game_id, turn_action,
-                                                                               card, advance_turn)
-                        if game_state:
-                            await send_game_update(game_state, current_game_id)
-
-                else:
-                    if current_game_id:
-                        await broadcast_to_room(current_game_id, {
-                            "event": "message",
-                            "sender_id": client_id,
-                            "sender_name": client_display_name,
-                            "text": str(payload)
-                        })
-                    else:
-                        await connection_manager.send_personal_message(json.dumps({
-                            "event": "echo",
-                            "text": "You are not in a game yet."
-                        }), client_id)
-
-            except json.JSONDecodeError:
+                await dispatch(ctx, websocket, data)
+
+            except DECODE_ERRORS:
                 pass
             except Exception as e:
-                await connection_manager.send_personal_message(json.dumps({
-                    "event": "error",
-                    "message": str(e)
-                }), client_id)
+                # Refused requests are reported via send_error; this only catches unexpected failures
+                await send_error(client_id, str(e))
 
     except WebSocketDisconnect:
         user_left_id: Optional[str] = await connection_manager.disconnect(websocket)
 
-        if current_game_id and user_left_id:
-            await leave_lobby(current_game_id, user_left_id, client_display_name)
+        if ctx.current_game_id and user_left_id:
+            # Leave the room in the background so the closed connection's handler returns right away
+            task = asyncio.create_task(leave_lobby(ctx.current_game_id, user_left_id, client_display_name))
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+
+
+async def dispatch(ctx: "ClientContext", websocket: WebSocket, data: str | bytes) -> None:
+    """
+    Decodes a frame straight into its action Struct and runs the action's handler.
+    Frames that aren't a known action are relayed to the room as chat.
+    """
+
+    try:
+        if isinstance(data, bytes) and websocket in connection_manager.msgpack_sockets:
+            action: Action = msgpack_action_decoder.decode(data)
+        else:
+            action = json_action_decoder.decode(data)
+    except msgspec.ValidationError as e:
+        # Well-formed, but not a valid action: chat (no or unknown action), or a known action with bad fields
+        payload = connection_manager.decode(websocket, data)
+        if not isinstance(payload, dict):
+            # A bare string, number or array is relayed as chat in its text form
+            text = payload if isinstance(payload, str) else orjson.dumps(payload).decode()
+            await _h_message(ctx, {"text": text})
+        elif payload.get("action") in ACTION_NAMES:
+            await send_error(ctx.client_id, str(e))
+        else:
+            await _h_message(ctx, payload)
+        return
+
+    await HANDLERS[type(action)](ctx, action)
+
+
+class ClientContext:
+    """
+    Per-connection state shared by the action handlers.
+    """
+
+    __slots__ = ("client_id", "display_name", "current_game_id")
+
+    def __init__(self, client_id: str, display_name: str) -> None:
+        self.client_id: str = client_id
+        self.display_name: str = display_name
+        self.current_game_id: Optional[str] = None
+
+
+async def _h_status_check(ctx: ClientContext, action: StatusCheck) -> None:
+    await broadcast_lobby_state()
+
+
+async def _h_create_game(ctx: ClientContext, action: CreateGame) -> None:
+    client_id: str = ctx.client_id
+
+    room_type: str = SessionType.PRIVATE.value if action.extra.is_private else SessionType.PUBLIC.value
+
+    max_players: int = action.extra.max_players
+    buy_in_fee: float = action.extra.buy_in
+
+    new_game_id: str = game_manager.reserve_id()
+
+    game_state, error = game_manager.create_game(new_game_id, client_id, ctx.display_name)
+    if error:
+        await send_error(client_id, error)
+        return
+
+    ctx.current_game_id = new_game_id
+
+    # Single-statement writes run on a bare connection: engine.begin() commits on exit and
+    # rolls back on error, without setting up an ORM session
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(insert(GameSession).values(
+                game_type_id= "SOLO",
+                room_code= new_game_id,
+                host_user_id= client_id,
+                room_type= room_type,
+                status= GameSessionStatus.WAITING.value,
+                current_players= 1,
+                max_players= max_players,
+                buy_in_amount= buy_in_fee
+            ))
+    except Exception as e:
+        print(f"DB Error creating game: {e}")
+
+    invalidate_lobby_cache()
+    await broadcast_lobby_state()
+
+    response = {
+        "event": "game_created",
+        "gameId": new_game_id,
+        "creator": client_id,
+        "players": game_state.players,
+        "playerNames": game_state.player_names,
+        "playerStates": game_state.player_states,
+        "message": f"Room {new_game_id} created."
+    }
+    await connection_manager.send_personal_message(orjson.dumps(response), client_id)
+
+
+async def _h_save_game_settings(ctx: ClientContext, action: SaveGameSettings) -> None:
+    current_game_id: Optional[str] = ctx.current_game_id
+    if not current_game_id:
+        return
+
+    settings: Dict = action.extra.settings
+    async with game_manager.with_game(current_game_id):
+        game_state: Optional[Game] = game_manager.update_game_settings(current_game_id, settings)
+
+    if game_state is not None:
+        # Spliced from the settings' cached encoding instead of dumping them again
+        response = (b'{"event":"game_settings_saved","settings":'
+                    + game_state.game_settings.to_json() + b'}')
+        await broadcast_to_room(current_game_id, response)
+
+
+async def _h_join_game(ctx: ClientContext, action: JoinGame) -> None:
+    client_id: str = ctx.client_id
+    target_id: str = normalize_game_id(action.game_id)
+
+    if not target_id:
+        await send_error(client_id, "Invalid game ID.")
+        return
+
+    async with game_manager.with_game(target_id):
+        game_state, error = game_manager.join_game(target_id, client_id, ctx.display_name)
+    if error:
+        await send_error(client_id, error)
+        return
+    if not game_state:
+        return
+
+    ctx.current_game_id = target_id
+
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(_JOIN_SESSION_STMT, {"room_code": target_id})
+    except Exception as e:
+        print(f"DB Error joining game: {e}")
+
+    invalidate_lobby_cache()
+    await broadcast_lobby_state()
+
+    room_update = PlayerJoined(
+        gameId=target_id,
+        players=game_state.players,
+        playerNames=game_state.player_names,
+        hostId=game_state.host_id,
+        playerStates=game_state.player_states,
+        message=f"{ctx.display_name} has joined the game"
+    )
+
+    await broadcast_to_room(target_id, json_encoder.encode(room_update))
+
+    response = {
+        "event": "game_joined",
+        "gameId": target_id,
+        "hostId": game_state.host_id,
+        "players": game_state.players,
+        "playerNames": game_state.player_names,
+        "playerStates": game_state.player_states,
+    }
+
+    await connection_manager.send_personal_message(orjson.dumps(response), client_id)
+
+
+async def _h_leave_game(ctx: ClientContext, action: LeaveGame) -> None:
+    if ctx.current_game_id:
+        await leave_lobby(ctx.current_game_id, ctx.client_id, ctx.display_name)
+        ctx.current_game_id = None
+
+
+async def _h_start_game(ctx: ClientContext, action: StartGame) -> None:
+    current_game_id: Optional[str] = ctx.current_game_id
+    if not current_game_id:
+        return
+
+    async with game_manager.with_game(current_game_id):
+        game_state, error = game_manager.start_game(current_game_id)
+        if error:
+            await send_error(ctx.client_id, error)
+        elif game_state:
+            await send_game_update(game_state, current_game_id, "game_started")
+
+
+async def _h_end_game(ctx: ClientContext, action: EndGame) -> None:
+    if ctx.current_game_id:
+        async with game_manager.with_game(ctx.current_game_id):
+            game_manager.end_game(ctx.current_game_id)
+
+
+async def _h_back_to_lobby(ctx: ClientContext, action: BackToLobby) -> None:
+    current_game_id: Optional[str] = ctx.current_game_id
+    if not current_game_id:
+        return
+
+    async with game_manager.with_game(current_game_id):
+        game_state: Optional[Game] = game_manager.set_player_back_to_lobby(current_game_id, ctx.client_id)
+    if game_state:
+        await broadcast_to_room(current_game_id, {
+            "event": "player_back_to_lobby",
+            "player_states": game_state.player_states
+        })
+
+
+async def _h_process_turn(ctx: ClientContext, action: ProcessTurn) -> None:
+    current_game_id: Optional[str] = ctx.current_game_id
+    if not current_game_id:
+        return
+
+    turn: ProcessTurnExtra = action.extra
+
+    async with game_manager.with_game(current_game_id):
+        game_state: Optional[Game] = game_manager.process_turn(ctx.client_id, current_game_id,
+                                                               turn.action, turn.card, turn.advance_turn)
+        if game_state:
+            await send_game_update(game_state, current_game_id)
+
+
+async def _h_message(ctx: ClientContext, payload: Dict) -> None:
+    """
+    Anything that isn't a known action is relayed to the room as a chat message.
+    """
+
+    if ctx.current_game_id:
+        await broadcast_to_room(ctx.current_game_id, {
+            "event": "message",
+            "sender_id": ctx.client_id,
+            "sender_name": ctx.display_name,
+            "text": payload.get("text") or orjson.dumps(payload).decode()
+        })
+    else:
+        await connection_manager.send_personal_message(orjson.dumps({
+            "event": "echo",
+            "text": "You are not in a game yet."
+        }), ctx.client_id)
+
+
+# Inbound action type -> handler, looked up once per message instead of walking an if/elif chain
+HANDLERS: Dict[Type[Action], Callable[[ClientContext, Any], Awaitable[None]]] = {
+    StatusCheck: _h_status_check,
+    CreateGame: _h_create_game,
+    SaveGameSettings: _h_save_game_settings,
+    JoinGame: _h_join_game,
+    LeaveGame: _h_leave_game,
+    StartGame: _h_start_game,
+    EndGame: _h_end_game,
+    BackToLobby: _h_back_to_lobby,
+    ProcessTurn: _h_process_turn,
+}
+
+
+async def send_error(client_id: str, message: str) -> None:
+    await connection_manager.send_personal_message(ERROR_TEMPLATE % orjson.dumps(message), client_id)
 
 
 async def leave_lobby(current_game_id: str, client_id: str, client_display_name: str):
-    game_manager.remove_player(current_game_id, client_id)
-
-    async with async_session() as session:
-        try:
-            result = await session.execute(
-                select(GameSession).where(GameSession.room_code == current_game_id)
-            )
-            session_row = result.scalar_one_or_none()
-
-            if session_row:
-                session_row.current_players -= 1
-                if session_row.current_players <= 0:
-                    session_row.status = GameSessionStatus.CANCELLED
-                await session.commit()
-        except Exception as e:
-            print(f"DB Error leaving game: {e}")
+    async with game_manager.with_game(current_game_id):
+        game_manager.remove_player(current_game_id, client_id)
+
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(_LEAVE_SESSION_STMT, {"room_code": current_game_id})
+    except Exception as e:
+        print(f"DB Error leaving game: {e}")
+
+    invalidate_lobby_cache()
 
     await broadcast_to_room(current_game_id, {
         "event": "player_left",
@@ -1,13 +1,15 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db import get_session
 from app.models import User
+from app.pydantic_models.adapters import USER_PROFILE
 from app.pydantic_models.outgoing.user_profile import UserProfile
 from app.security import get_current_user
 
 router = APIRouter()
 
-@router.get("/me", response_model= UserProfile)
+@router.get("/me", responses={200: {"model": UserProfile}})
 async def get_profile(current_user: User = Depends(get_current_user)):
-    return current_user
+    profile = USER_PROFILE.validate_python(current_user, from_attributes=True)
+    return Response(content=USER_PROFILE.dump_json(profile, by_alias=True), media_type="application/json")
@@ -1,10 +1,15 @@
+import asyncio
+import hashlib
 import os
+import time
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
+import jwt
+from jwt import InvalidTokenError
 from passlib.context import CryptContext
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -12,19 +17,27 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.db import get_session
 from app.models import User
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+# New hashes use argon2id; existing bcrypt hashes still verify and are upgraded on the next login
+pwd_context = CryptContext(schemes=["argon2", "bcrypt"], deprecated="auto")
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+# Decoded payloads of recently verified tokens, keyed by a digest of the token so the cache doesn't hold raw tokens.
+# Reconnects and repeated requests skip the signature check; expiry is still checked on every hit
+_verified_tokens: TTLCache = TTLCache(maxsize=10000, ttl=30)
+
+# Hashing is CPU-bound, so it runs in a worker thread instead of blocking the event loop
+async def hash_password(password: str) -> str:
+    return await asyncio.to_thread(pwd_context.hash, password)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verifies a password and, if its hash uses a deprecated scheme, also returns a new hash to store.
+    """
+    return await asyncio.to_thread(pwd_context.verify_and_update, plain_password, hashed_password)
 
 def create_access_token(data: dict):
     to_encode = data.copy()
@@ -37,13 +50,19 @@ def create_access_token(data: dict):
 def verify_token(token: str) -> Dict[str, Any]:
     """
     Decodes and validates the JWT token. 
-    Returns the payload if valid, raises JWTError if invalid.
+    Returns the payload if valid, raises a 401 HTTPException if invalid.
     Used by both HTTP routes and WebSockets.
     """
+    token_key: bytes = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    payload: Optional[Dict[str, Any]] = _verified_tokens.get(token_key)
+    if payload is not None and payload.get("exp", 0) > time.time():
+        return payload
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        _verified_tokens[token_key] = payload
         return payload
-    except JWTError:
+    except InvalidTokenError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
@@ -67,7 +86,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
-    except (JWTError, HTTPException):
+    except (InvalidTokenError, HTTPException):
         raise credentials_exception
 
     result = await db.execute(select(User).where(User.username == username))
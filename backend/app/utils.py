@@ -1,40 +1,58 @@
+import os
 import random
 import string
-from typing import Tuple, List
+import sys
+from typing import Dict, FrozenSet, Tuple, List
 
-SPECIAL_CARDS: List[str] = ['S', 'R', 'D2']
-WILD_CARDS: List[str] = ['W-Wild', 'W-W4']
-REGULAR_CARDS: List[str] = ['R', 'B', 'G', 'Y']
+SPECIAL_CARDS: FrozenSet[str] = frozenset({'S', 'R', 'D2'})
+WILD_CARDS: FrozenSet[str] = frozenset({'W-Wild', 'W-W4'})
+REGULAR_CARDS: FrozenSet[str] = frozenset({'R', 'B', 'G', 'Y'})
 
-from datetime import date
 
+_GAME_ID_ALPHABET: str = string.ascii_uppercase
 
-def generate_game_id(length: int =4) -> str:
+# Upper-cases ASCII letters in one C-level pass
+GAME_ID_XLAT: bytes = bytes.maketrans(string.ascii_lowercase.encode(), string.ascii_uppercase.encode())
+
+
+def generate_game_ids(count: int, length: int = 4) -> List[str]:
     """
-    Generate a random 4-letter room ID (e.g., 'ABCD')
+    Generate a batch of random room IDs (e.g., 'ABCD') from one buffer of OS randomness.
+    Bytes of 234 and above are discarded so every letter stays equally likely (234 = 9 * 26).
     """
 
-    return ''.join(random.choices(string.ascii_uppercase, k=length))
+    needed: int = count * length
+    letters: List[str] = []
+    while len(letters) < needed:
+        letters.extend(_GAME_ID_ALPHABET[b % 26] for b in os.urandom(needed + needed // 8) if b < 234)
 
+    return [sys.intern(''.join(letters[i:i + length])) for i in range(0, needed, length)]
 
-def str_to_date_iso(date_str: str) -> date:
-    return date.fromisoformat(date_str)
 
-def create_deck() -> List[str]:
+def normalize_game_id(game_id: str) -> str:
+    """
+    Upper-cases a client-supplied game ID, dropping any non-ASCII characters.
+    The result is interned so lookups in the games dict compare by identity.
+    """
+
+    return sys.intern(game_id.encode("ascii", "ignore").translate(GAME_ID_XLAT).decode("ascii"))
+
+
+def _build_deck() -> List[str]:
     """
-    Creates a shuffled deck of cards
+    Builds one unshuffled deck of cards.
     """
 
     deck: List[str] = []
 
-    for color in REGULAR_CARDS:
+    for color in sorted(REGULAR_CARDS):
         deck.append(f"{color}-0")
 
         for i in range(1, 10):
             deck.append(f"{color}-{i}")
             deck.append(f"{color}-{i}")
 
-        for sp in SPECIAL_CARDS:
+        for sp in sorted(SPECIAL_CARDS):
             deck.append(f"{color}-{sp}")
             deck.append(f"{color}-{sp}")
 
@@ -42,23 +60,81 @@ def create_deck() -> List[str]:
         deck.append("W-Wild")
         deck.append("W-W4")
 
-    random.shuffle(deck)
     return deck
 
-def advance_turn_counter(current_player_index: int, player_count: int, is_clockwise: bool) -> int:
+
+# Every game uses the same 108 cards, so the deck is built once and only shuffled per game.
+# The faces are interned, so each is one shared object that the card tables below are keyed by
+_DECK_TEMPLATE: Tuple[str, ...] = tuple(sys.intern(card) for card in _build_deck())
+
+
+def create_deck() -> List[str]:
     """
-    Advances the turn counter based on the current direction of play.
+    Creates a shuffled deck of cards. The top of the deck is the end of the list.
     """
 
-    if is_clockwise:
-        return 0 if current_player_index == player_count - 1 else current_player_index + 1
-    else:
-        return player_count - 1 if current_player_index == 0 else current_player_index - 1
+    return random.sample(_DECK_TEMPLATE, len(_DECK_TEMPLATE))
+
+def _parse_card_info(card: str) -> Tuple[str, str]:
+    return card[0], card[-1]
 
 
 def retrieve_card_info(card: str) -> Tuple[str, str]:
     """
     Retrieves the color and number of a card.
+    Known card faces are looked up in a table built at import; anything else (e.g. a bare color) is parsed.
+    """
+
+    info: Tuple[str, str] | None = _CARD_COLOR_VALUE.get(card)
+    return info if info is not None else _parse_card_info(card)
+
+
+# --- Card lookup tables ---
+# Each distinct card face gets a small integer id so a set of faces (a hand, or the
+# cards that may currently be played) fits in a single int bitmask.
+
+CARD_FACES: Tuple[str, ...] = tuple(sys.intern(card) for card in (
+    [f"{color}-{value}" for color in sorted(REGULAR_CARDS)
+     for value in [str(i) for i in range(10)] + sorted(SPECIAL_CARDS)]
+    + sorted(WILD_CARDS)
+))
+CARD_ID: Dict[str, int] = {card: card_id for card_id, card in enumerate(CARD_FACES)}
+CARD_BIT: Dict[str, int] = {card: 1 << card_id for card, card_id in CARD_ID.items()}
+
+# Card effect flags, tested with `&` instead of comparing card strings
+CARD_SKIP: int = 1
+CARD_REVERSE: int = 2
+CARD_DRAW2: int = 4
+CARD_WILD: int = 8
+CARD_WILD4: int = 16
+
+CARD_ACTION_FLAGS: int = CARD_SKIP | CARD_REVERSE | CARD_DRAW2
+CARD_WILD_FLAGS: int = CARD_WILD | CARD_WILD4
+
+_SUFFIX_FLAGS: Dict[str, int] = {'S': CARD_SKIP, 'R': CARD_REVERSE, 'D2': CARD_DRAW2, 'Wild': CARD_WILD, 'W4': CARD_WILD4}
+
+# card face -> (color, value)
+_CARD_COLOR_VALUE: Dict[str, Tuple[str, str]] = {card: _parse_card_info(card) for card in CARD_FACES}
+
+# card id -> (color, value, flags)
+CARD_INFO: Tuple[Tuple[str, str, int], ...] = tuple(
+    (*_CARD_COLOR_VALUE[card], _SUFFIX_FLAGS.get(card[2:], 0)) for card in CARD_FACES
+)
+
+WILD_MASK: int = 0
+COLOR_MASKS: Dict[str, int] = {}
+VALUE_MASKS: Dict[str, int] = {}
+for _card, (_color, _value, _flags) in zip(CARD_FACES, CARD_INFO):
+    if _flags & CARD_WILD_FLAGS:
+        WILD_MASK |= CARD_BIT[_card]
+    else:
+        COLOR_MASKS[_color] = COLOR_MASKS.get(_color, 0) | CARD_BIT[_card]
+    VALUE_MASKS[_value] = VALUE_MASKS.get(_value, 0) | CARD_BIT[_card]
+
+
+def playable_mask(active_color: str | None, top_card_value: str | None) -> int:
+    """
+    Returns the bitmask of every card face that may be played on top of the discard pile.
     """
 
-    return card[0], card[-1]
\ No newline at end of file
+    return COLOR_MASKS.get(active_color, 0) | VALUE_MASKS.get(top_card_value, 0) | WILD_MASK
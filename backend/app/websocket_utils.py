@@ -1,77 +1,152 @@
-import json
-from typing import List, Dict
+import asyncio
+import logging
+from typing import List, Dict, Optional, Set, Tuple
+
+import orjson
 
 from app.dependencies import game_manager, connection_manager
 from app.pydantic_models.game import Game
-from app.pydantic_models.game_state import GameState
+from app.pydantic_models.outgoing.game_events import GameUpdate, LobbyUpdate, PlayerView, UNSET, json_encoder
 
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
 
 
 from app.db import async_session
-from app.models import GameSession, GameSessionStatus, SessionType
+from app.models import GameSession, GameSessionStatus, SessionType, User
+
+
+logger = logging.getLogger(__name__)
+
+# Public sessions still WAITING, with their host's username
+_LOBBY_STMT = (
+    select(
+        GameSession.room_code,
+        User.username,
+        GameSession.current_players,
+        GameSession.max_players,
+        GameSession.buy_in_amount,
+    )
+    .outerjoin(User, GameSession.host_user_id == User.user_id)
+    .where(GameSession.status == GameSessionStatus.WAITING.value, GameSession.room_type == SessionType.PUBLIC.value)
+)
+
+# The lobby_update frame built from the DB, reused until a create/join/leave bumps the version
+_lobby_version: int = 0
+_lobby_frame: Optional[bytes] = None
+_lobby_frame_version: int = -1
+_lobby_lock: asyncio.Lock = asyncio.Lock()
+
+# Lobby broadcasts requested within this window are sent as one
+LOBBY_BROADCAST_DELAY_SECONDS: float = 0.1
+_pending_lobby_broadcast: Optional[asyncio.TimerHandle] = None
+_lobby_broadcast_tasks: Set[asyncio.Task] = set()
 
 
 async def get_database_lobby_info():
     """
     Async query to fetch WAITING games from the DB.
-    Uses selectinload to fetch the host user data efficiently.
+    Selects just the listed columns, joined to the host's username, as plain rows instead of ORM objects.
     """
     async with async_session() as session:
-        # Fetch games with status WAITING and eager load the host relationship
-        query = (
-            select(GameSession)
-            .options(selectinload(GameSession.host))
-            .where(GameSession.status == GameSessionStatus.WAITING, GameSession.room_type == SessionType.PUBLIC)
-        )
-        result = await session.execute(query)
-        active_sessions = result.scalars().all()
+        result = await session.execute(_LOBBY_STMT)
 
         return [
             {
-                "gameId": session.room_code,
-                "hostName": session.host.username if session.host else "Unknown",
-                "playerCount": session.current_players,
-                "maxPlayers": session.max_players,
-                "buyIn": float(session.buy_in_amount),
+                "gameId": room_code,
+                "hostName": host_name or "Unknown",
+                "playerCount": current_players,
+                "maxPlayers": max_players,
+                "buyIn": float(buy_in),
                 "isActive": True
             }
-            for session in active_sessions
+            for room_code, host_name, current_players, max_players, buy_in in result
         ]
 
 
+def invalidate_lobby_cache() -> None:
+    """
+    Marks the cached lobby frame as stale. Call after committing a change to the listed sessions.
+    """
+
+    global _lobby_version
+    _lobby_version += 1
+
+
+async def get_lobby_frame() -> bytes:
+    """
+    Returns the encoded lobby_update frame, querying the DB only when the cache is stale.
+    """
+
+    global _lobby_frame, _lobby_frame_version
+
+    if _lobby_frame is not None and _lobby_frame_version == _lobby_version:
+        return _lobby_frame
+
+    # Concurrent misses wait for the first query instead of each running their own
+    async with _lobby_lock:
+        if _lobby_frame is not None and _lobby_frame_version == _lobby_version:
+            return _lobby_frame
+
+        version: int = _lobby_version
+        frame: bytes = json_encoder.encode(LobbyUpdate(games=await get_database_lobby_info()))
+
+        # An invalidation during the query means the result may already be stale, so it isn't cached
+        if version == _lobby_version:
+            _lobby_frame, _lobby_frame_version = frame, version
+        return frame
+
+
 async def broadcast_lobby_state() -> None:
     """
     Sends the current list of available games to EVERYONE connected.
     Useful for updating the 'Join Game' screen for users not yet in a game.
+    The send is scheduled shortly after the first request, so a burst of create/join/leave events
+    queries and fans out the lobby only once.
     """
 
-    lobby_data = await get_database_lobby_info()
+    global _pending_lobby_broadcast
+
+    if _pending_lobby_broadcast is None:
+        _pending_lobby_broadcast = asyncio.get_running_loop().call_later(
+            LOBBY_BROADCAST_DELAY_SECONDS, _start_lobby_broadcast
+        )
+
+
+def _start_lobby_broadcast() -> None:
+    global _pending_lobby_broadcast
+    _pending_lobby_broadcast = None
+
+    # The loop only holds tasks weakly, so keep a reference until the broadcast is done
+    task = asyncio.create_task(_send_lobby_state())
+    _lobby_broadcast_tasks.add(task)
+    task.add_done_callback(_lobby_broadcast_tasks.discard)
 
-    message = {
-        "event": "lobby_update",
-        "games": lobby_data
-    }
-    await connection_manager.broadcast(json.dumps(message))
 
+async def _send_lobby_state() -> None:
+    try:
+        await connection_manager.broadcast_bytes(await get_lobby_frame())
+    except Exception:
+        logger.exception("Lobby broadcast failed")
 
-async def broadcast_to_room(game_id: str, message: Dict) -> None:
+
+async def broadcast_to_room(game_id: str, message: Dict | bytes) -> None:
     """
     Helper to send a message ONLY to players in a specific room.
+    The message may already be encoded as JSON bytes.
     """
 
     player_ids = game_manager.get_player_ids(game_id)
-    json_msg = json.dumps(message)
+    json_msg: bytes = message if isinstance(message, bytes) else orjson.dumps(message)
 
-    for player_id in player_ids:
-        await connection_manager.send_personal_message(json_msg, player_id)
+    await connection_manager.broadcast_bytes(json_msg, player_ids)
 
 
 
 async def send_game_update(game_state: Game, current_game_id: str, event: str = "game_update") -> None:
     """
     Sends a game update to all players in the current game.
+    Players who were already sent this version of the game are skipped, and the rest only receive
+    the fields that changed since their last update (a full snapshot on game start or reconnect).
     """
 
     players: List[str] = game_state.players
@@ -81,25 +156,64 @@ async def send_game_update(game_state: Game, current_game_id: str, event: str =
     current_player_index: int = game_state.current_player_index
     current_player_id: str = players[current_player_index]
 
+    # Snapshot of the fields shared by every player; each player is only sent the ones that changed for them.
+    # player_states is copied because the game keeps mutating its own dict
+    all_counts: Dict[str, int] = {player_id: len(player_cards[player_id]) for player_id in players}
+    shared: Dict = {
+        "current_active_color": game_state.current_active_color,
+        "direction": game_state.direction,
+        "top_card": game_state.discard_pile[-1] if game_state.discard_pile else None,
+        "current_player": current_player_id,
+        "player_states": dict(game_state.player_states),
+        "card_counts": all_counts,
+    }
+    force_full: bool = event == "game_started"
+
+    # Players whose update changes the same shared keys get byte-identical shared parts, so each distinct
+    # part is encoded once and only the hand and card counts are encoded per player
+    encoded_shared: Dict[Tuple, bytes] = {}
+
     for player_id in players:
-        game_update_json = GameState(
-            event=event,
-            game_id=current_game_id,
-            current_active_color=game_state.current_active_color,
-            direction=game_state.direction,
-            top_card=game_state.discard_pile[-1] if game_state.discard_pile else None,
-            current_player=current_player_id,
-            hand=player_cards.get(player_id, []),
-            card_counts={
-                other_player_id: len(player_cards[other_player_id])
-                for other_player_id in players
-                if other_player_id != player_id
-            },
-            game_event=game_state.event,
-            player_states=game_state.player_states
-        )
+        if not connection_manager.claim_version(player_id, current_game_id, game_state.version):
+            continue
+
+        fields: Dict = {**shared, "hand": list(player_cards.get(player_id, []))}
+        payload, is_full = connection_manager.diff_fields(player_id, current_game_id, fields, force_full)
+
+        personal: Optional[PlayerView] = None
+        if "hand" in payload or "card_counts" in payload:
+            personal = PlayerView(hand=payload.pop("hand", UNSET))
+            if payload.pop("card_counts", None) is not None:
+                # Players only see their opponents' counts
+                opponent_counts: Dict[str, int] = all_counts.copy()
+                del opponent_counts[player_id]
+                personal.card_counts = opponent_counts
+
+        shared_key: Tuple = (is_full, *payload)
+        shared_json: Optional[bytes] = encoded_shared.get(shared_key)
+        if shared_json is None:
+            # The event is always sent, since the same event can legitimately happen twice in a row
+            shared_json = json_encoder.encode(GameUpdate(
+                event=event,
+                game_id=current_game_id,
+                seq=game_state.version,
+                full=is_full,
+                game_event=game_state.event,
+                **payload
+            ))
+            encoded_shared[shared_key] = shared_json
+
+        message: bytes = shared_json
+        if personal is not None:
+            message = _merge_json_objects(shared_json, json_encoder.encode(personal))
+
+        # Only queues the frame on the player's connection
+        await connection_manager.send_personal_message(message, player_id)
+
+
+def _merge_json_objects(first: bytes, second: bytes) -> bytes:
+    """
+    Joins two encoded, non-empty JSON objects with distinct keys into one.
+    """
 
-        await connection_manager.send_personal_message(
-            game_update_json.model_dump_json(),
-            player_id
-        )
+    return first[:-1] + b"," + second[1:]
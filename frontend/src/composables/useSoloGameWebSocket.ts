@@ -36,6 +36,25 @@ const otherPlayerCardCounts = ref<Record<string, number>>({})
 const event = ref<Record<string, any>>({});
 const lockDrawableCardPile = ref<boolean>(false);
 
+// Broadcasts arrive as pre-encoded binary frames; personal messages as text
+const textDecoder = new TextDecoder();
+
+// Large broadcasts are zlib-compressed by the server and prefixed with this byte
+const COMPRESSED_FLAG = 0x01;
+
+const decodeFrame = async (data: string | ArrayBuffer): Promise<string> => {
+  if (typeof data === "string") return data;
+
+  const bytes = new Uint8Array(data);
+  if (bytes[0] !== COMPRESSED_FLAG) return textDecoder.decode(bytes);
+
+  const stream = new Blob([bytes.subarray(1)]).stream().pipeThrough(new DecompressionStream("deflate"));
+  return await new Response(stream).text();
+};
+
+// Frames are decoded one after another so a compressed frame can't be overtaken by the next one
+let frameQueue: Promise<void> = Promise.resolve();
+
 export function useSoloGameWebSocket() {
   const router = useRouter();
 
@@ -54,10 +73,12 @@ export function useSoloGameWebSocket() {
     const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws';
     const apiHost = window.location.hostname;
     const apiPort = '8000';
-    const wsUrl = `${protocol}://${apiHost}:${apiPort}/games/${gameTypeId}/ws?token=${token}`;
+    const wsUrl = `${protocol}://${apiHost}:${apiPort}/games/${gameTypeId}/ws`;
 
     console.log(`Connecting to Backend: ${wsUrl}`);
-    socket.value = new WebSocket(wsUrl);
+    // The token travels in the handshake's subprotocol list rather than the URL, so it stays out of access logs
+    socket.value = new WebSocket(wsUrl, ['uno.auth', token]);
+    socket.value.binaryType = "arraybuffer";
 
     socket.value.onopen = () => {
       console.log("Connected to Solo Lobby WebSocket");
@@ -67,12 +88,15 @@ export function useSoloGameWebSocket() {
     };
 
     socket.value.onmessage = (event) => {
-      try {
-        const data = JSON.parse(event.data);
-        handleMessage(data);
-      } catch (e) {
-        console.error("Failed to parse websocket message", e);
-      }
+      frameQueue = frameQueue.then(async () => {
+        try {
+          const raw = await decodeFrame(event.data);
+          const data = JSON.parse(raw);
+          handleMessage(data);
+        } catch (e) {
+          console.error("Failed to parse websocket message", e);
+        }
+      });
     };
 
     socket.value.onclose = (event) => {
@@ -118,6 +142,11 @@ export function useSoloGameWebSocket() {
     console.log("Received:", data);
 
     switch (data.event) {
+      case "batch":
+        // Several messages the server coalesced into one frame, in their original order
+        for (const message of data.events || []) handleMessage(message);
+        break;
+
       case "lobby_update":
         if (gameState.value !== "LANDING") return;
         availableGames.value = data.games || [];